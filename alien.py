@@ -68,6 +68,16 @@ class Alien:
         """
         return self.__lengths[self.__shapenum]
 
+    def get_lengths(self):
+        """Returns the line segment lengths of every shape
+        """
+        return self.__lengths
+
+    def get_widths(self):
+        """Returns the widths of every shape
+        """
+        return self.__widths
+
     def get_width(self):
         """Returns the radius of the current shape
         """
@@ -0,0 +1,126 @@
+# benchmark.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains a headless benchmark runner: it transforms every map of a
+config file at every granularity, runs every registered search method on the
+result and writes one CSV or JSON row per run.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+import tracemalloc
+
+from const import *
+from mapconfig import loadMap, loadMaps
+from maze import NoStartError, NoObjectiveError
+from search import search, SEARCH_METHODS
+from transform import transformToMaze
+
+FIELDS = ['label', 'map', 'granularity', 'method', 'repeat', 'grid_size', 'dimensions', 'transform_s', 'search_s',
+          'states_explored', 'path_length', 'peak_memory_bytes', 'error']
+
+def load_map(configfile, map_name):
+    """Returns (alien, goals, walls, window) of a map section, walls including the window border"""
+    map_config = loadMap(configfile, map_name)
+    return map_config.makeAlien(), map_config.getGoals(), map_config.getWalls(), map_config.window
+
+def run_once(alien, goals, walls, window, granularity, method, workers=1):
+    """Transforms the map and searches it once
+
+    Returns:
+        dict: transform and search times, states explored, path length, grid size and dimensions
+    """
+    start = time.perf_counter()
+    maze = transformToMaze(alien, goals, walls, window, granularity, workers)
+    transform_time = time.perf_counter() - start
+    maze.states_explored = 0
+    start = time.perf_counter()
+    path = search(maze, method)
+    search_time = time.perf_counter() - start
+    dimensions = maze.getDimensions()
+    return {'grid_size': int(dimensions[X] * dimensions[Y] * dimensions[SHAPE]),
+            'dimensions': 'x'.join(str(d) for d in dimensions),
+            'transform_s': transform_time, 'search_s': search_time,
+            'states_explored': maze.states_explored, 'path_length': len(path) if path else 0}
+
+def peak_memory(alien, goals, walls, window, granularity, method, workers=1):
+    """Peak Python heap allocation, in bytes, of one traced (and so slower, untimed) run"""
+    tracemalloc.start()
+    try:
+        run_once(alien, goals, walls, window, granularity, method, workers)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_benchmarks(configfile, map_names=None, granularities=(2,5,8,10), methods=None, repeats=3, warmup=1, workers=1, label=''):
+    """Yields one row (dict with the keys of FIELDS) per timed run
+
+    Every (map, granularity, method) combination is first run warmup times without
+    recording anything, then repeats times. Its peak memory comes from one extra
+    traced run and is the same in all its rows. Combinations whose maze cannot be
+    built (no start or no objectives) yield a single row holding the error.
+    """
+    for map_name in map_names or loadMaps(configfile):
+        for granularity in granularities:
+            for method in methods or sorted(SEARCH_METHODS):
+                args = load_map(configfile, map_name) + (granularity, method, workers)
+                row = {field: '' for field in FIELDS}
+                row.update(label=label, map=map_name, granularity=granularity, method=method)
+                try:
+                    for _ in range(warmup):
+                        run_once(*args)
+                    memory = peak_memory(*args)
+                    for repeat in range(repeats):
+                        row.update(run_once(*args), repeat=repeat, peak_memory_bytes=memory)
+                        yield dict(row)
+                except (NoStartError, NoObjectiveError) as e:
+                    row.update(error='{}: {}'.format(type(e).__name__, e))
+                    yield row
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='headless transform and search benchmarks')
+    parser.add_argument('--config', dest='configfile', type=str, default='./maps/test_config.txt',
+                        help='map configuration file - default ./maps/test_config.txt')
+    parser.add_argument('--maps', dest='maps', nargs='+', default=None,
+                        help='map sections to run - default all of them')
+    parser.add_argument('--granularities', dest='granularities', type=int, nargs='+', default=[2,5,8,10],
+                        help='granularities to run - default 2 5 8 10')
+    parser.add_argument('--methods', dest='methods', nargs='+', default=None, choices=sorted(SEARCH_METHODS),
+                        help='search methods to run - default every registered one')
+    parser.add_argument('--repeats', dest='repeats', type=int, default=3,
+                        help='recorded runs per combination - default 3')
+    parser.add_argument('--warmup', dest='warmup', type=int, default=1,
+                        help='unrecorded runs per combination before the recorded ones - default 1')
+    parser.add_argument('--workers', dest='workers', type=int, default=1,
+                        help='number of processes used by transformToMaze - default 1')
+    parser.add_argument('--format', dest='format', choices=['csv', 'json'], default='csv',
+                        help='output format, JSON is one object per line - default csv')
+    parser.add_argument('--output', dest='output', type=str, default=None,
+                        help='output file - default standard output')
+    parser.add_argument('--label', dest='label', type=str, default='',
+                        help='value of the label column, e.g. a release name, to compare runs')
+    args = parser.parse_args()
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(output, FIELDS) if args.format == 'csv' else None
+        if writer:
+            writer.writeheader()
+        for row in run_benchmarks(args.configfile, args.maps, args.granularities, args.methods,
+                                  args.repeats, args.warmup, args.workers, args.label):
+            if writer:
+                writer.writerow(row)
+            else:
+                output.write(json.dumps(row) + '\n')
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
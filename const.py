@@ -27,6 +27,17 @@ START_CHAR = 'P'
 OBJECTIVE_CHAR = '.'
 SPACE_CHAR = ' '
 
+# compact uint8 cell codes, CELL_CHARS[code] is the matching ASCII character
+SPACE_CODE = 0
+WALL_CODE = 1
+START_CODE = 2
+OBJECTIVE_CODE = 3
+CELL_CHARS = (SPACE_CHAR, WALL_CHAR, START_CHAR, OBJECTIVE_CHAR)
+# cell of a lazy maze that was not evaluated yet
+UNKNOWN_CODE = 255
+# side, in cells, of the (x, y) blocks a lazy maze evaluates at once, over every shape
+LAZY_BLOCK_SIZE = 8
+
 ALPHA = 0
 BETA = 1
 GAMMA = 2
@@ -34,5 +45,14 @@ X = 0
 Y = 1
 SHAPE = 2
 
+ALIEN_SHAPES = ('Horizontal','Ball','Vertical')
+
 DEFAULT_FPS = 30
 DEFAULT_GRANULARITY = 2
+DEFAULT_HEURISTIC_WEIGHT = 2
+# search.ObjectiveGraph orders up to this many objective clusters by dynamic programming, more by A*
+TOUR_DP_MAX_OBJECTIVES = 10
+
+# on-disk cache of transformed mazes, see transform.MazeCache
+MAZE_CACHE_DIR = './maze_cache'
+MAZE_CACHE_MAX_BYTES = 256 * 1024 * 1024
@@ -15,14 +15,85 @@ This file contains geometry functions necessary for solving problems in MP2
 import math
 import numpy as np
 from alien import Alien
+from const import *
+from util import configsToArray
+import profiling
 
 
+class WallIndex:
+    """Uniform grid over the bounding boxes of the wall segments of a map
+
+        Every wall is registered in each grid cell its bounding box overlaps, so a
+        query only has to look at the walls stored in the cells around the query
+        point instead of at every wall of the map. Build it once per map and pass it
+        wherever a list of walls is expected by the wall collision checks.
+    """
+
+    def __init__(self, walls, cell_size=None):
+        """Builds the index
+
+            Args:
+                walls (list): walls in the format [(startx, starty, endx, endy), ...]
+                cell_size (float): side of a grid cell, defaults to the median wall extent
+        """
+        self.segments = np.asarray(walls, dtype=float).reshape(-1, 4)
+        self.__lo = np.minimum(self.segments[:, :2], self.segments[:, 2:])
+        self.__hi = np.maximum(self.segments[:, :2], self.segments[:, 2:])
+        # zero length walls are never pruned, since does_intersect reports them as
+        # touching anything on the same row/column no matter how far away it is
+        self.__always = np.flatnonzero((self.__lo == self.__hi).all(axis=1))
+        self.__buckets = {}
+        if(len(self.segments) == 0):
+            self.__origin = np.zeros(2)
+            self.__cell_size = 1.0
+            return
+
+        if(cell_size is None):
+            cell_size = np.median((self.__hi - self.__lo).max(axis=1))
+        self.__cell_size = max(float(cell_size), 1.0)
+        self.__origin = self.__lo.min(axis=0)
+        first = self.__cell_of(self.__lo)
+        last = self.__cell_of(self.__hi)
+        for idx in range(len(self.segments)):
+            for i in range(first[idx, X], last[idx, X] + 1):
+                for j in range(first[idx, Y], last[idx, Y] + 1):
+                    self.__buckets.setdefault((i, j), []).append(idx)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __cell_of(self, pts):
+        return np.floor((pts - self.__origin) / self.__cell_size).astype(int)
+
+    def query(self, x0, y0, x1, y1):
+        """Returns the sorted indices of the walls whose bounding box overlaps the box [x0, x1] x [y0, y1]
+        """
+        (i0, j0), (i1, j1) = self.__cell_of(np.array([[x0, y0], [x1, y1]]))
+        candidates = set(self.__always)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                candidates.update(self.__buckets.get((i, j), ()))
+        idx = np.array(sorted(candidates), dtype=int)
+        overlap = ((self.__lo[idx, X] <= x1) & (self.__hi[idx, X] >= x0)
+                   & (self.__lo[idx, Y] <= y1) & (self.__hi[idx, Y] >= y0))
+        return idx[overlap | np.isin(idx, self.__always)]
+
+    def near(self, xs, ys, radius):
+        """Returns the indices of every wall that may lie within radius of any of the given points
+
+            The box is widened a little beyond radius so that walls at a distance
+            np.isclose to radius are still returned.
+        """
+        pad = radius + abs(radius)*1e-4 + 1e-6
+        return self.query(np.min(xs) - pad, np.min(ys) - pad, np.max(xs) + pad, np.max(ys) + pad)
+
 def does_alien_touch_wall(alien, walls,granularity):
     """Determine whether the alien touches a wall
 
         Args:
             alien (Alien): Instance of Alien class that will be navigating our map
             walls (list): List of endpoints of line segments that comprise the walls in the maze in the format [(startx, starty, endx, endx), ...]
+                          or a WallIndex built over them
             granularity (int): The granularity of the map
 
         Return:
@@ -37,6 +108,12 @@ def does_alien_touch_wall(alien, walls,granularity):
         positions.append(np.array(alien.get_centroid()))
     else:
         positions = np.array(alien.get_head_and_tail())
+    if(isinstance(walls, WallIndex)):
+        pts = np.array(positions, dtype=float)
+        walls = walls.segments[walls.near(pts[:, 0], pts[:, 1], buf)]
+    if(profiling.enabled):
+        profiling.count('geometry.wall_checks.' + alien.get_shape())
+        profiling.count('geometry.wall_tests', len(walls))
     
     for w in walls:
         w1 = np.array([w[0],w[1]])
@@ -70,6 +147,8 @@ def does_alien_touch_goal(alien, goals):
         Return:
             True if a goal is touched, False if not.
     """
+    if(profiling.enabled):
+        profiling.count('geometry.goal_checks.' + alien.get_shape())
     aR = alien.get_width()
     positions = []
     if(alien.is_circle()):
@@ -105,6 +184,8 @@ def is_alien_within_window(alien, window,granularity):
             window (tuple): (width, height) of the window
             granularity (int): The granularity of the map
     """
+    if(profiling.enabled):
+        profiling.count('geometry.window_checks.' + alien.get_shape())
     winX = window[0]
     winY = window[1]
     radius = alien.get_width()
@@ -168,8 +249,471 @@ def does_intersect(wall,oblong):
     sin1 = np.cross(a,b) / (np.linalg.norm(a) * wallNorm)
     sin2 = np.cross(a2,b)/ (np.linalg.norm(a2)* wallNorm)
     return(np.sign(sin1)!=np.sign(sin2))
-    
+
+# Vectorized counterparts of the checks above. Each one evaluates a whole array of
+# centroids that share a single shape, broadcasting them against every wall/goal
+# at once. The arithmetic mirrors the scalar functions term for term so that the
+# np.isclose tie-breaking gives exactly the same answers.
+
+def _is_touching(dist, bound):
+    return (dist < bound) | np.isclose(dist, bound)
+
+def _norm(x, y):
+    return np.sqrt(x*x + y*y)
+
+def _head_and_tail(xs, ys, shape, length):
+    # same as Alien.get_head_and_tail, for arrays of centroids
+    if(shape == 'Horizontal'):
+        return (xs + length/2, ys), (xs - length/2, ys)
+    elif(shape == 'Vertical'):
+        return (xs, ys - length/2), (xs, ys + length/2)
+    return (xs, ys), (xs, ys)
+
+def _dist_pt_to_segment(px, py, sx, sy, ex, ey):
+    # broadcasting version of dist_pt_to_line(p, [s, e])
+    ax, ay = sx - px, sy - py
+    bx, by = sx - ex, sy - ey
+    cx, cy = ex - px, ey - py
+    lineNorm = _norm(bx, by)
+    dotdist = (ax*bx + ay*by) / lineNorm
+    return np.where(dotdist > lineNorm, _norm(cx, cy),
+                    np.where(dotdist < 0, _norm(ax, ay), np.abs((ax*by - ay*bx) / lineNorm)))
+
+def _segments_intersect(w1x, w1y, w2x, w2y, hx, hy, tx, ty):
+    # broadcasting version of does_intersect([w1, w2], [head, tail])
+    ax, ay = w1x - hx, w1y - hy
+    a2x, a2y = w1x - tx, w1y - ty
+    bx, by = w1x - w2x, w1y - w2y
+    wallNorm = _norm(bx, by)
+    sin1 = (ax*by - ay*bx) / (_norm(ax, ay) * wallNorm)
+    sin2 = (a2x*by - a2y*bx) / (_norm(a2x, a2y) * wallNorm)
+    return np.sign(sin1) != np.sign(sin2)
+
+def _shape_touches_wall(xs, ys, shape, length, width, walls, granularity):
+    """Vectorized does_alien_touch_wall for N centroids that all have the same shape
+
+        Args:
+            xs, ys (array): x and y coordinates of the N centroids
+            shape (str): the shape shared by all centroids
+            length (float): line segment length of that shape
+            width (float): width of that shape
+            walls (list): walls in the format [(startx, starty, endx, endy), ...]
+            granularity (int): The granularity of the map
+
+        Return:
+            Boolean array of length N, True where the alien touches a wall
+    """
+    xs = np.asarray(xs, dtype=float).reshape(-1, 1)
+    ys = np.asarray(ys, dtype=float).reshape(-1, 1)
+    walls = np.asarray(walls, dtype=float).reshape(-1, 4)
+    if(walls.shape[0] == 0):
+        return np.zeros(xs.shape[0], dtype=bool)
+    w1x, w1y, w2x, w2y = walls.T
+    buf = width/2 + (granularity / np.sqrt(2))
+    (hx, hy), (tx, ty) = _head_and_tail(xs, ys, shape, length)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        touched = _is_touching(_dist_pt_to_segment(hx, hy, w1x, w1y, w2x, w2y), buf)
+        if(shape != 'Ball'):
+            touched |= _is_touching(_dist_pt_to_segment(tx, ty, w1x, w1y, w2x, w2y), buf)
+            touched |= _is_touching(_dist_pt_to_segment(w1x, w1y, hx, hy, tx, ty), buf)
+            touched |= _is_touching(_dist_pt_to_segment(w2x, w2y, hx, hy, tx, ty), buf)
+            if(shape == 'Horizontal'):
+                inRange = (hy <= np.maximum(w1y, w2y)) & (hy >= np.minimum(w1y, w2y))
+            else:
+                inRange = (hx <= np.maximum(w1x, w2x)) & (hx >= np.minimum(w1x, w2x))
+            touched |= inRange & _segments_intersect(w1x, w1y, w2x, w2y, hx, hy, tx, ty)
+    return touched.any(axis=1)
+
+def _shape_touches_goal(xs, ys, shape, shape_idx, length, width, goals):
+    """Vectorized does_alien_touch_goal for N centroids that all have the same shape
+
+        Args:
+            xs, ys (array): x and y coordinates of the N centroids
+            shape (str): the shape shared by all centroids
+            shape_idx (int): index of that shape in the alien's shape list
+            length (float): line segment length of that shape
+            width (float): width of that shape
+            goals (list): goals in the format [(x, y, r), ...]
+
+        Return:
+            Boolean array of length N, True where the alien touches a goal
+    """
+    xs = np.asarray(xs, dtype=float).reshape(-1, 1)
+    ys = np.asarray(ys, dtype=float).reshape(-1, 1)
+    goals = np.asarray(goals, dtype=float).reshape(-1, 3)
+    if(goals.shape[0] == 0):
+        return np.zeros(xs.shape[0], dtype=bool)
+    gx, gy, gR = goals.T
+    bound = width/2 + gR
+    (hx, hy), (tx, ty) = _head_and_tail(xs, ys, shape, length)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        touched = _is_touching(_norm(hx - gx, hy - gy), bound)
+        if(shape == 'Ball'):
+            return touched.any(axis=1)
+        touched |= _is_touching(_norm(tx - gx, ty - gy), bound)
+        if(shape_idx == 2):
+            between = (gy > hy) & (gy < ty)
+        elif(shape_idx == 0):
+            between = (gx < hx) & (gx > tx)
+        else:
+            return touched.any(axis=1)
+        dx, dy = tx - hx, ty - hy
+        lineDist = np.abs((dx*(hy - gy) - dy*(hx - gx)) / _norm(dx, dy))
+        touched |= between & _is_touching(lineDist, bound)
+    return touched.any(axis=1)
+
+def _shape_within_window(xs, ys, shape, length, width, window, granularity):
+    """Vectorized is_alien_within_window for N centroids that all have the same shape
+
+        Args:
+            xs, ys (array): x and y coordinates of the N centroids
+            shape (str): the shape shared by all centroids
+            length (float): line segment length of that shape
+            width (float): width of that shape
+            window (tuple): (width, height) of the window
+            granularity (int): The granularity of the map
+
+        Return:
+            Boolean array of length N, True where the alien stays within the window
+    """
+    xs = np.asarray(xs, dtype=float).reshape(-1)
+    ys = np.asarray(ys, dtype=float).reshape(-1)
+    winX, winY = window[0], window[1]
+    buf = width/2 + (granularity / np.sqrt(2))
+    head, tail = _head_and_tail(xs, ys, shape, length)
+    positions = [head] if shape == 'Ball' else [head, tail]
+
+    outside = np.zeros(xs.shape[0], dtype=bool)
+    for px, py in positions:
+        outside |= ((px-buf) < 0) | np.isclose((px-buf), 0)
+        outside |= ((px+buf) > winX) | np.isclose((px+buf), winX)
+        outside |= ((py-buf) < 0) | np.isclose((py-buf), 0)
+        outside |= ((py+buf) > winY) | np.isclose((py+buf), winY)
+    return ~outside
+
+def does_alien_touch_wall_batch(configs, walls, granularity, lengths, widths, shapes=ALIEN_SHAPES):
+    """Batch version of does_alien_touch_wall
+
+        Args:
+            configs (array): (N, 3) array of alien configurations in the format [(x, y, shape idx), ...]
+            walls (list): List of endpoints of line segments that comprise the walls in the maze in the format [(startx, starty, endx, endx), ...]
+                          or a WallIndex built over them. With an index only the walls near the configs are tested,
+                          so it pays off when the configs are spatially clustered
+            granularity (int): The granularity of the map
+            lengths (list): line segment length of each shape
+            widths (list): width of each shape
+            shapes (list): possible shapes of the alien, indexed by the shape idx of configs
+
+        Return:
+            Boolean array of length N, True where the alien touches a wall
+    """
+    configs = np.asarray(configs, dtype=float).reshape(-1, 3)
+    touched = np.zeros(configs.shape[0], dtype=bool)
+    for shape_idx, shape in enumerate(shapes):
+        sel = configs[:, SHAPE] == shape_idx
+        if(not sel.any()):
+            continue
+        shape_walls = walls
+        if(isinstance(walls, WallIndex)):
+            (hx, hy), (tx, ty) = _head_and_tail(configs[sel, X], configs[sel, Y], shape, lengths[shape_idx])
+            buf = widths[shape_idx]/2 + (granularity / np.sqrt(2))
+            shape_walls = walls.segments[walls.near(np.concatenate([hx, tx]), np.concatenate([hy, ty]), buf)]
+        if(profiling.enabled):
+            num = int(np.count_nonzero(sel))
+            profiling.count('geometry.wall_checks.' + shape, num)
+            profiling.count('geometry.wall_tests', num * len(shape_walls))
+        touched[sel] = _shape_touches_wall(configs[sel, X], configs[sel, Y], shape,
+                                           lengths[shape_idx], widths[shape_idx], shape_walls, granularity)
+    return touched
+
+def does_alien_touch_goal_batch(configs, goals, lengths, widths, shapes=ALIEN_SHAPES):
+    """Batch version of does_alien_touch_goal
+
+        Args:
+            configs (array): (N, 3) array of alien configurations in the format [(x, y, shape idx), ...]
+            goals (list): x, y coordinate and radius of goals in the format [(x, y, r), ...]
+            lengths (list): line segment length of each shape
+            widths (list): width of each shape
+            shapes (list): possible shapes of the alien, indexed by the shape idx of configs
+
+        Return:
+            Boolean array of length N, True where the alien touches a goal
+    """
+    configs = np.asarray(configs, dtype=float).reshape(-1, 3)
+    touched = np.zeros(configs.shape[0], dtype=bool)
+    for shape_idx, shape in enumerate(shapes):
+        sel = configs[:, SHAPE] == shape_idx
+        if(sel.any()):
+            if(profiling.enabled):
+                profiling.count('geometry.goal_checks.' + shape, np.count_nonzero(sel))
+            touched[sel] = _shape_touches_goal(configs[sel, X], configs[sel, Y], shape, shape_idx,
+                                               lengths[shape_idx], widths[shape_idx], goals)
+    return touched
+
+def is_alien_within_window_batch(configs, window, granularity, lengths, widths, shapes=ALIEN_SHAPES):
+    """Batch version of is_alien_within_window
+
+        Args:
+            configs (array): (N, 3) array of alien configurations in the format [(x, y, shape idx), ...]
+            window (tuple): (width, height) of the window
+            granularity (int): The granularity of the map
+            lengths (list): line segment length of each shape
+            widths (list): width of each shape
+            shapes (list): possible shapes of the alien, indexed by the shape idx of configs
+
+        Return:
+            Boolean array of length N, True where the alien stays within the window
+    """
+    configs = np.asarray(configs, dtype=float).reshape(-1, 3)
+    inside = np.zeros(configs.shape[0], dtype=bool)
+    for shape_idx, shape in enumerate(shapes):
+        sel = configs[:, SHAPE] == shape_idx
+        if(sel.any()):
+            if(profiling.enabled):
+                profiling.count('geometry.window_checks.' + shape, np.count_nonzero(sel))
+            inside[sel] = _shape_within_window(configs[sel, X], configs[sel, Y], shape,
+                                               lengths[shape_idx], widths[shape_idx], window, granularity)
+    return inside
+
+def _dist_pt_to_clamped_segment(px, py, sx, sy, ex, ey):
+    # distance from points to segments that may have zero length, as the swept
+    # edges of a Ball or of a move along the alien's own axis do
+    dx, dy = ex - sx, ey - sy
+    lengthSq = dx*dx + dy*dy
+    t = np.clip(((px - sx)*dx + (py - sy)*dy) / np.where(lengthSq > 0, lengthSq, 1), 0, 1)
+    return _norm(sx + t*dx - px, sy + t*dy - py)
+
+def _cross(ax, ay, bx, by, px, py):
+    # z component of (b - a) x (p - a), positive when p is to the left of a -> b
+    return (bx - ax)*(py - ay) - (by - ay)*(px - ax)
+
+def _dist_segment_to_segment(ax, ay, bx, by, cx, cy, dx, dy):
+    # 0 where [a, b] and [c, d] properly cross, otherwise the smallest endpoint to segment distance
+    crossing = ((_cross(ax, ay, bx, by, cx, cy) * _cross(ax, ay, bx, by, dx, dy) < 0)
+                & (_cross(cx, cy, dx, dy, ax, ay) * _cross(cx, cy, dx, dy, bx, by) < 0))
+    dist = np.minimum(np.minimum(_dist_pt_to_clamped_segment(ax, ay, cx, cy, dx, dy),
+                                 _dist_pt_to_clamped_segment(bx, by, cx, cy, dx, dy)),
+                      np.minimum(_dist_pt_to_clamped_segment(cx, cy, ax, ay, bx, by),
+                                 _dist_pt_to_clamped_segment(dx, dy, ax, ay, bx, by)))
+    return np.where(crossing, 0.0, dist)
+
+def _shape_sweep_touches_wall(x0s, y0s, x1s, y1s, shape, length, width, walls, granularity):
+    """Vectorized wall test of N straight moves of an alien that keeps the same shape
+
+        The alien's segment sweeps the parallelogram spanned by its head to tail
+        segment and the move, which degenerates to a segment for a Ball or for a
+        move along the alien's own axis. A move touches a wall when the wall comes
+        within the same buffer as in _shape_touches_wall of that region.
+
+        Args:
+            x0s, y0s (array): x and y coordinates of the N start centroids
+            x1s, y1s (array): x and y coordinates of the N end centroids
+            shape (str): the shape shared by all moves
+            length (float): line segment length of that shape
+            width (float): width of that shape
+            walls (list): walls in the format [(startx, starty, endx, endy), ...]
+            granularity (int): The granularity of the map
+
+        Return:
+            Boolean array of length N, True where the alien touches a wall somewhere along the move
+    """
+    x0s = np.asarray(x0s, dtype=float).reshape(-1, 1)
+    y0s = np.asarray(y0s, dtype=float).reshape(-1, 1)
+    x1s = np.asarray(x1s, dtype=float).reshape(-1, 1)
+    y1s = np.asarray(y1s, dtype=float).reshape(-1, 1)
+    walls = np.asarray(walls, dtype=float).reshape(-1, 4)
+    if(walls.shape[0] == 0):
+        return np.zeros(x0s.shape[0], dtype=bool)
+    w1x, w1y, w2x, w2y = walls.T
+    buf = width/2 + (granularity / np.sqrt(2))
+    (hx, hy), (tx, ty) = _head_and_tail(x0s, y0s, shape, length)
+    mx, my = x1s - x0s, y1s - y0s
+    edges = [(hx, hy, hx + mx, hy + my)]
+    if(shape != 'Ball'):
+        edges += [(tx, ty, tx + mx, ty + my), (hx, hy, tx, ty), (hx + mx, hy + my, tx + mx, ty + my)]
+
+    dist = np.full((x0s.shape[0], walls.shape[0]), np.inf)
+    for sx, sy, ex, ey in edges:
+        dist = np.minimum(dist, _dist_segment_to_segment(w1x, w1y, w2x, w2y, sx, sy, ex, ey))
+    touched = _is_touching(dist, buf)
+    if(shape != 'Ball'):
+        # a wall lying entirely inside the parallelogram crosses none of its edges:
+        # solve w1 = h + a*(t - h) + b*m and check 0 <= a, b <= 1
+        ax, ay = tx - hx, ty - hy
+        det = ax*my - ay*mx
+        ok = np.abs(det) > 1e-9
+        det = np.where(ok, det, 1)
+        px, py = w1x - hx, w1y - hy
+        a = (px*my - py*mx) / det
+        b = (ax*py - ay*px) / det
+        touched |= ok & (a >= 0) & (a <= 1) & (b >= 0) & (b <= 1)
+    return touched.any(axis=1)
+
+def does_alien_sweep_touch_wall_batch(starts, ends, walls, granularity, lengths, widths, shapes=ALIEN_SHAPES):
+    """Batch wall test of straight moves, the swept version of does_alien_touch_wall_batch
+
+        Every move translates the alien from a start configuration to an end
+        configuration of the same shape, and is tested for a wall anywhere along
+        the way rather than only at its two ends. A move between two configurations
+        that are within the window stays within it, so only walls are tested.
+
+        Args:
+            starts (array): (N, 3) array of start configurations in the format [(x, y, shape idx), ...]
+            ends (array): (N, 3) array of end configurations, with the same shape idx as the starts
+            walls (list): List of endpoints of line segments that comprise the walls in the maze in the format [(startx, starty, endx, endx), ...]
+                          or a WallIndex built over them
+            granularity (int): The granularity of the map
+            lengths (list): line segment length of each shape
+            widths (list): width of each shape
+            shapes (list): possible shapes of the alien, indexed by the shape idx of the configurations
+
+        Return:
+            Boolean array of length N, True where the alien touches a wall during the move
+    """
+    starts = np.asarray(starts, dtype=float).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 3)
+    if(starts.shape != ends.shape or np.any(starts[:, SHAPE] != ends[:, SHAPE])):
+        raise ValueError('a swept move cannot change the shape of the alien')
+    touched = np.zeros(starts.shape[0], dtype=bool)
+    for shape_idx, shape in enumerate(shapes):
+        sel = starts[:, SHAPE] == shape_idx
+        if(not sel.any()):
+            continue
+        shape_walls = walls
+        if(isinstance(walls, WallIndex)):
+            # the swept parallelogram lies within the bounding box of its four corners
+            corners = [point for configs in (starts, ends)
+                       for point in _head_and_tail(configs[sel, X], configs[sel, Y], shape, lengths[shape_idx])]
+            xs = np.concatenate([point[X] for point in corners])
+            ys = np.concatenate([point[Y] for point in corners])
+            buf = widths[shape_idx]/2 + (granularity / np.sqrt(2))
+            shape_walls = walls.segments[walls.near(xs, ys, buf)]
+        if(profiling.enabled):
+            num = int(np.count_nonzero(sel))
+            profiling.count('geometry.sweep_checks.' + shape, num)
+            profiling.count('geometry.wall_tests', num * len(shape_walls))
+        touched[sel] = _shape_sweep_touches_wall(starts[sel, X], starts[sel, Y], ends[sel, X], ends[sel, Y], shape,
+                                                 lengths[shape_idx], widths[shape_idx], shape_walls, granularity)
+    return touched
+
+def _box_cells(xs, ys, box):
+    # index ranges of the cells of the grid xs x ys (both ascending) within box = (x0, y0, x1, y1)
+    return (slice(np.searchsorted(xs, box[0], 'left'), np.searchsorted(xs, box[2], 'right')),
+            slice(np.searchsorted(ys, box[1], 'left'), np.searchsorted(ys, box[3], 'right')))
+
+def _rasterize(layer, xs, ys, boxes, test):
+    # sets the cells of a layer over the grid xs x ys that lie in any of the boxes,
+    # are not set yet and pass test(cell xs, cell ys), tested in a single call
+    candidates = np.zeros_like(layer)
+    for box in boxes:
+        candidates[_box_cells(xs, ys, box)] = True
+    ix, iy = np.nonzero(candidates & ~layer)
+    if(len(ix)):
+        layer[ix, iy] = test(xs[ix], ys[iy])
+
+def _pad(reach):
+    # same widening as WallIndex.near, so cells at a distance np.isclose to reach stay in the box
+    return reach + abs(reach)*1e-4 + 1e-6
+
+def rasterize_walls(xs, ys, walls, granularity, lengths, widths, shapes=ALIEN_SHAPES):
+    """Occupancy grid of the configurations where the alien touches a wall
+
+        A centroid touches a wall when it lies in the Minkowski sum of the wall and
+        the alien's segment reflected through the centroid, widened by the buffer of
+        does_alien_touch_wall: a capsule around the wall for the Ball, and the wall
+        swept along the alien's segment with rounded ends for Horizontal and
+        Vertical. Each wall is cut into pieces about as long as the alien, and only
+        the cells within the bounding box of a piece's Minkowski sum are tested, so
+        the cost grows with the length of the walls and the resolution of the grid
+        rather than with cells x walls. The cells are tested as in
+        does_alien_touch_wall_batch, so both agree everywhere.
+
+        Args:
+            xs, ys (array): ascending x and y coordinates of the grid columns and rows
+            walls (list): walls in the format [(startx, starty, endx, endy), ...] or a WallIndex built over them
+            granularity (int): The granularity of the map
+            lengths (list): line segment length of each shape
+            widths (list): width of each shape
+            shapes (list): possible shapes of the alien
+
+        Return:
+            Boolean array of shape (len(xs), len(ys), len(shapes)), True where the alien touches a wall
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    if(isinstance(walls, WallIndex)):
+        walls = walls.segments
+    walls = np.asarray(walls, dtype=float).reshape(-1, 4)
+    occupied = np.zeros((len(xs), len(ys), len(shapes)), dtype=bool)
+    for shape_idx, shape in enumerate(shapes):
+        layer = occupied[:, :, shape_idx]
+        length, width = lengths[shape_idx], widths[shape_idx]
+        buf = width/2 + (granularity / np.sqrt(2))
+        (hx, hy), (tx, ty) = _head_and_tail(0.0, 0.0, shape, length)
+        reachX, reachY = _pad(max(abs(hx), abs(tx)) + buf), _pad(max(abs(hy), abs(ty)) + buf)
+        piece = max(abs(hx - tx) + abs(hy - ty), granularity) + 2*buf
+        for wall in walls:
+            x0, y0, x1, y1 = wall
+            def touches(cxs, cys, wall=wall):
+                return _shape_touches_wall(cxs, cys, shape, length, width, wall, granularity)
+            if(profiling.enabled):
+                profiling.count('geometry.rasterized_walls.' + shape)
+            if((x0, y0) == (x1, y1)):
+                # zero length walls touch every cell sharing their row or column, see WallIndex
+                _rasterize(layer, xs, ys, [(-np.inf, -np.inf, np.inf, np.inf)], touches)
+                continue
+            pieces = int(np.ceil(np.hypot(x1 - x0, y1 - y0) / piece))
+            ends = np.linspace(0, 1, pieces + 1)
+            px, py = x0 + (x1 - x0)*ends, y0 + (y1 - y0)*ends
+            _rasterize(layer, xs, ys, [(min(px[k], px[k+1]) - reachX, min(py[k], py[k+1]) - reachY,
+                                        max(px[k], px[k+1]) + reachX, max(py[k], py[k+1]) + reachY)
+                                       for k in range(pieces)], touches)
+    return occupied
+
+def rasterize_goals(xs, ys, goals, lengths, widths, shapes=ALIEN_SHAPES, skip=None):
+    """Occupancy grid of the configurations where the alien touches a goal
+
+        Only the cells within the bounding box of each goal widened by the size of
+        the alien are tested, as in does_alien_touch_goal_batch.
+
+        Args:
+            xs, ys (array): ascending x and y coordinates of the grid columns and rows
+            goals (list): goals in the format [(x, y, r), ...]
+            lengths (list): line segment length of each shape
+            widths (list): width of each shape
+            shapes (list): possible shapes of the alien
+            skip (array): optional boolean array of shape (len(xs), len(ys), len(shapes)) of
+                          cells not to test, such as walls, which are False in the result
+
+        Return:
+            Boolean array of shape (len(xs), len(ys), len(shapes)), True where the alien touches a goal
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    goals = np.asarray(goals, dtype=float).reshape(-1, 3)
+    touched = np.zeros((len(xs), len(ys), len(shapes)), dtype=bool) if skip is None else skip.copy()
+    for shape_idx, shape in enumerate(shapes):
+        layer = touched[:, :, shape_idx]
+        length, width = lengths[shape_idx], widths[shape_idx]
+        def touches(cxs, cys):
+            return _shape_touches_goal(cxs, cys, shape, shape_idx, length, width, goals)
+        reach = _pad(length/2 + width/2 + goals[:, 2])
+        _rasterize(layer, xs, ys, zip(goals[:, X] - reach, goals[:, Y] - reach, goals[:, X] + reach, goals[:, Y] + reach), touches)
+    if(skip is not None):
+        touched &= ~skip
+    return touched
+
 if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='geometry sanity tests')
+    parser.add_argument('--benchmark', default = False, action = 'store_true',
+                        help = 'also benchmark wall queries with and without a WallIndex')
+    args = parser.parse_args()
+
     #Walls, goals, and aliens taken from Test1 map
     walls =   [(0,100,100,100),  
                 (0,140,100,140),
@@ -187,6 +731,7 @@ if __name__ == '__main__':
                 (90,55,90,25)]
     goals = [(110, 40, 10)]
     window = (220, 200)
+    wall_index = WallIndex(walls)
 
     def test_helper(alien : Alien, position, truths):
         alien.set_alien_pos(position)
@@ -200,6 +745,16 @@ if __name__ == '__main__':
         assert touch_goal_result == truths[1], f'does_alien_touch_goal(alien, goals) with alien config {config} returns {touch_goal_result}, expected: {truths[1]}'
         assert in_window_result == truths[2], f'is_alien_within_window(alien, window) with alien config {config} returns {in_window_result}, expected: {truths[2]}'
 
+        configs = configsToArray([config], alien.get_shapes())
+        batch_results = (does_alien_touch_wall_batch(configs, walls, 0, alien.get_lengths(), alien.get_widths(), alien.get_shapes())[0],
+                         does_alien_touch_goal_batch(configs, goals, alien.get_lengths(), alien.get_widths(), alien.get_shapes())[0],
+                         is_alien_within_window_batch(configs, window, 0, alien.get_lengths(), alien.get_widths(), alien.get_shapes())[0])
+        assert batch_results == tuple(truths), f'batch checks with alien config {config} return {batch_results}, expected: {truths}'
+
+        indexed_results = (does_alien_touch_wall(alien, wall_index, 0),
+                           does_alien_touch_wall_batch(configs, wall_index, 0, alien.get_lengths(), alien.get_widths(), alien.get_shapes())[0])
+        assert indexed_results == (truths[0], truths[0]), f'wall checks through WallIndex with alien config {config} return {indexed_results}, expected: {truths[0]}'
+
     #Initialize Aliens and perform simple sanity check. 
     alien_ball = Alien((30,120), [40, 0, 40], [11, 25, 11], ('Horizontal','Ball','Vertical'), 'Ball', window)
     test_helper(alien_ball, alien_ball.get_centroid(), (False, False, True))
@@ -310,10 +865,51 @@ if __name__ == '__main__':
         test_helper(alien_horz, alien_positions[i], alien_horz_truths[i])
         test_helper(alien_vert, alien_positions[i], alien_vert_truths[i])
 
+    #All positions and shapes in a single batch
+    all_configs = [(x, y, shape) for shape in alien_ball.get_shapes() for x, y in alien_positions]
+    all_truths = np.array(alien_horz_truths + alien_ball_truths + alien_vert_truths)
+    configs = configsToArray(all_configs, alien_ball.get_shapes())
+    assert np.array_equal(does_alien_touch_wall_batch(configs, walls, 0, alien_ball.get_lengths(), alien_ball.get_widths()), all_truths[:, 0])
+    assert np.array_equal(does_alien_touch_wall_batch(configs, wall_index, 0, alien_ball.get_lengths(), alien_ball.get_widths()), all_truths[:, 0])
+    assert np.array_equal(does_alien_touch_goal_batch(configs, goals, alien_ball.get_lengths(), alien_ball.get_widths()), all_truths[:, 1])
+    assert np.array_equal(is_alien_within_window_batch(configs, window, 0, alien_ball.get_lengths(), alien_ball.get_widths()), all_truths[:, 2])
+
     #Edge case coincide line endpoints
     test_helper(edge_horz_alien, edge_horz_alien.get_centroid(), (True, False, False))
     test_helper(edge_horz_alien, (110,55), (True, True, True))
     test_helper(edge_vert_alien, edge_vert_alien.get_centroid(), (True, False, True))
 
 
-    print("Geometry tests passed\n")
\ No newline at end of file
+    print("Geometry tests passed\n")
+
+    def benchmark_wall_index(tiles=(1, 2, 4, 6, 8, 9), num_queries=200):
+        # Test1 walls repeated on a tiles x tiles grid of windows, so the wall
+        # density stays the same while the wall count grows
+        rng = np.random.default_rng(0)
+        alien = Alien((0, 0), [40, 0, 40], [11, 25, 11], ('Horizontal','Ball','Vertical'), 'Ball', window)
+        print('{:>6} {:>12} {:>14} {:>14} {:>9}'.format('walls', 'build (ms)', 'list (us/q)', 'index (us/q)', 'speedup'))
+        for n in tiles:
+            big_walls = [(x0 + window[0]*i, y0 + window[1]*j, x1 + window[0]*i, y1 + window[1]*j)
+                         for i in range(n) for j in range(n) for x0, y0, x1, y1 in walls]
+            queries = [(x, y, shape) for x, y, shape in zip(rng.uniform(0, window[0]*n, num_queries),
+                                                             rng.uniform(0, window[1]*n, num_queries),
+                                                             rng.choice(alien.get_shapes(), num_queries))]
+            start = time.perf_counter()
+            index = WallIndex(big_walls)
+            build = time.perf_counter() - start
+            timings = []
+            results = []
+            for wall_set in (big_walls, index):
+                start = time.perf_counter()
+                hits = []
+                for config in queries:
+                    alien.set_alien_config(config)
+                    hits.append(does_alien_touch_wall(alien, wall_set, 2))
+                timings.append((time.perf_counter() - start) / num_queries)
+                results.append(hits)
+            assert results[0] == results[1], 'WallIndex changed the result of does_alien_touch_wall'
+            print('{:>6} {:>12.2f} {:>14.1f} {:>14.1f} {:>8.1f}x'.format(
+                len(big_walls), build*1e3, timings[0]*1e6, timings[1]*1e6, timings[0]/timings[1]))
+
+    if args.benchmark:
+        benchmark_wall_index()
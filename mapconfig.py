@@ -0,0 +1,189 @@
+# mapconfig.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the loader of map configuration files such as
+maps/test_config.txt. Every field is read as a Python literal, never evaluated,
+and a parsed file is kept until its modification time changes, so batch runs
+over many maps and granularities parse it once.
+"""
+
+import ast
+import configparser
+import os
+
+import numpy as np
+
+from alien import Alien
+from const import *
+
+class MapError(Exception):
+    pass
+
+class Map:
+    """One map section of a configuration file
+
+        Attributes:
+            name (str): section name, e.g. 'Test1'
+            window (tuple): (width, height)
+            obstacles (np.ndarray): (N, 4) float array of walls (startx, starty, endx, endy), without the window border
+            goals (np.ndarray): (M, 3) float array of goals (x, y, radius)
+            lengths (list): segment length of each shape, in the order of ALIEN_SHAPES
+            widths (list): width of each shape, in the order of ALIEN_SHAPES
+            start (tuple): (x, y) centroid the alien starts at
+    """
+
+    def __init__(self, name, window, obstacles, goals, lengths, widths, start):
+        self.name = name
+        self.window = window
+        self.obstacles = obstacles
+        self.goals = goals
+        self.lengths = lengths
+        self.widths = widths
+        self.start = start
+
+    def getBoundary(self):
+        """Returns the four walls of the window border"""
+        width, height = self.window
+        return [(0,0,0,height),(0,0,width,0),(width,0,width,height),(0,height,width,height)]
+
+    def getWalls(self, boundary=True):
+        """Returns a new list of wall tuples, by default followed by the window border, as transformToMaze takes them"""
+        walls = [tuple(wall) for wall in self.obstacles.tolist()]
+        if(boundary):
+            walls.extend(self.getBoundary())
+        return walls
+
+    def getGoals(self):
+        """Returns a new list of (x, y, radius) goal tuples"""
+        return [tuple(goal) for goal in self.goals.tolist()]
+
+    def makeAlien(self, shape='Ball'):
+        """Returns a new alien in the given shape at the start point of the map"""
+        return Alien(list(self.start), list(self.lengths), list(self.widths), list(ALIEN_SHAPES), shape, self.window)
+
+# absolute path -> (modification time, {section name: Map}, {section name: MapError})
+_cache = {}
+
+def _literal(config, section, option):
+    try:
+        return ast.literal_eval(config.get(section, option).strip())
+    except configparser.Error as e:
+        raise MapError('{}: {}'.format(section, e))
+    except (ValueError, SyntaxError) as e:
+        raise MapError('{}: {} is not a literal: {}'.format(section, option, e))
+
+def _array(config, section, option, columns):
+    value = _literal(config, section, option)
+    try:
+        array = np.array(value, dtype=float).reshape(-1, columns)
+    except (TypeError, ValueError):
+        raise MapError('{}: {} must be a list of {}-tuples of numbers'.format(section, option, columns))
+    if(len(value) != len(array)):
+        raise MapError('{}: {} must be a list of {}-tuples of numbers'.format(section, option, columns))
+    return array
+
+def _numbers(config, section, option, length):
+    value = _literal(config, section, option)
+    if(not isinstance(value, (list, tuple)) or len(value) != length or
+       not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)):
+        raise MapError('{}: {} must be {} numbers'.format(section, option, length))
+    return value
+
+def parseSection(config, section):
+    """Returns the Map of one section of a ConfigParser, raising MapError when a field is missing or malformed"""
+    return Map(section, tuple(_numbers(config, section, 'Window', 2)),
+               _array(config, section, 'Obstacles', 4), _array(config, section, 'Goals', 3),
+               list(_numbers(config, section, 'Lengths', len(ALIEN_SHAPES))),
+               list(_numbers(config, section, 'Widths', len(ALIEN_SHAPES))),
+               tuple(_numbers(config, section, 'StartPoint', 2)))
+
+def parseMaps(configfile):
+    """Parses every section of a configuration file, without caching
+
+        Sections that are not alien maps, such as the robotic arm BasicMap, do not
+        stop the others from loading; their errors are returned instead.
+
+        Returns:
+            (dict, dict): section name -> Map in file order, and section name -> MapError
+    """
+    config = configparser.ConfigParser()
+    if(not config.read(configfile)):
+        raise MapError('cannot read map configuration file {}'.format(configfile))
+    maps, errors = {}, {}
+    for section in config.sections():
+        try:
+            maps[section] = parseSection(config, section)
+        except MapError as e:
+            errors[section] = e
+    return maps, errors
+
+def _load(configfile):
+    path = os.path.abspath(configfile)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        raise MapError('cannot read map configuration file {}'.format(configfile))
+    cached = _cache.get(path)
+    if(cached is None or cached[0] != mtime):
+        cached = (mtime,) + parseMaps(path)
+        _cache[path] = cached
+    return cached[1], cached[2]
+
+def loadMaps(configfile):
+    """Returns the maps of parseMaps(configfile), parsing the file again only when its modification time changed
+
+        The returned maps are shared between callers and must not be modified.
+    """
+    return _load(configfile)[0]
+
+def loadMap(configfile, map_name):
+    """Returns the Map of one section of a configuration file, see loadMaps"""
+    maps, errors = _load(configfile)
+    if(map_name in errors):
+        raise errors[map_name]
+    if(map_name not in maps):
+        raise MapError('no map {} in {}'.format(map_name, configfile))
+    return maps[map_name]
+
+if __name__ == '__main__':
+    import time
+
+    configfile = './maps/test_config.txt'
+
+    # the loops batch scripts ran: configparser and eval of every field, per map and granularity
+    def eval_load(map_name):
+        config = configparser.ConfigParser()
+        config.read(configfile)
+        window = eval(config.get(map_name, 'Window'))
+        obstacles = eval(config.get(map_name, 'Obstacles'))
+        obstacles.extend([(0,0,0,window[1]),(0,0,window[0],0),(window[0],0,window[0],window[1]),(0,window[1],window[0],window[1])])
+        goals = eval(config.get(map_name, 'Goals'))
+        alien = Alien(eval(config.get(map_name, 'StartPoint')),eval(config.get(map_name, 'Lengths')),
+                      eval(config.get(map_name, 'Widths')),list(ALIEN_SHAPES),'Ball',window)
+        return alien, goals, obstacles, window
+
+    def map_load(map_name):
+        section = loadMap(configfile, map_name)
+        return section.makeAlien(), section.getGoals(), section.getWalls(), section.window
+
+    map_names = list(parseMaps(configfile)[0])
+    for map_name in map_names:
+        expected, loaded = eval_load(map_name), map_load(map_name)
+        assert expected[1:] == loaded[1:], 'map {} parsed differently'.format(map_name)
+        assert expected[0].get_config() == loaded[0].get_config()
+
+    granularities = (2,5,8,10)
+    print('{:<34} {:>10} {:>10}'.format('loader', 'loads', 'time (ms)'))
+    for name, load in (('configparser + eval per load', eval_load), ('mapconfig, parsed once', map_load),
+                       ('mapconfig, whole file per load', lambda map_name: parseMaps(configfile)[0][map_name])):
+        _cache.clear()
+        start = time.perf_counter()
+        for granularity in granularities:
+            for map_name in map_names:
+                load(map_name)
+        print('{:<34} {:>10} {:>10.2f}'.format(name, len(granularities) * len(map_names), (time.perf_counter() - start)*1e3))
@@ -13,10 +13,10 @@ a representation of the maze that is exposed through a simple interface.
 """
 
 import copy
+import struct
 import numpy as np
 from const import *
 from util import *
-from itertools import chain
 
 class MazeError(Exception):
     pass
@@ -27,20 +27,113 @@ class NoStartError(Exception):
 class NoObjectiveError(Exception):
     pass
 
+def toCells(input_map):
+    """Convert a map of ASCII cell characters to a contiguous uint8 array of cell codes
+
+    Args:
+        input_map (array_like): map of characters, or an array that already holds cell codes
+
+    Returns:
+        np.ndarray: uint8 array of the same shape holding SPACE_CODE, WALL_CODE, START_CODE or OBJECTIVE_CODE
+    """
+    input_map = np.asarray(input_map)
+    if input_map.dtype == np.uint8:
+        return np.ascontiguousarray(input_map)
+    cells = np.zeros(input_map.shape, dtype=np.uint8)
+    known = np.zeros(input_map.shape, dtype=bool)
+    for code, char in enumerate(CELL_CHARS):
+        match = input_map == char
+        cells[match] = code
+        known |= match
+    if not known.all():
+        raise MazeError('unknown maze character(s) {0}'.format(sorted(set(np.unique(input_map[~known])))))
+    return cells
+
+# binary maze files, see Maze.saveToBinaryFile
+BINARY_MAZE_MAGIC = b'MP2MAZE\0'
+BINARY_MAZE_VERSION = 1
+BINARY_MAZE_ALIGNMENT = 64
+BINARY_MAZE_EXTENSION = '.bmaze'
+# magic, version, rows, cols, levels, granularity, number of objectives, offset of the cells
+_BINARY_HEADER = struct.Struct('<8sIIIIIIQ')
+
+# ASCII byte -> cell code lookup, and the reverse
+_UNKNOWN_CODE = 255
+_BYTE_CODES = np.full(256, _UNKNOWN_CODE, dtype=np.uint8)
+for code, char in enumerate(CELL_CHARS):
+    _BYTE_CODES[ord(char)] = code
+_CHAR_BYTES = np.frombuffer(''.join(CELL_CHARS).encode(), dtype=np.uint8)
+
+def asciiToBinary(ascii_path, binary_path):
+    """Convert an ASCII maze file to a binary maze file"""
+    return Maze(None, None, filepath=ascii_path).saveToBinaryFile(binary_path)
+
+def binaryToAscii(binary_path, ascii_path):
+    """Convert a binary maze file to an ASCII maze file"""
+    return Maze(None, None, filepath=binary_path).saveToFile(ascii_path)
+
+def _asciiCells(text, path):
+    # (rows, columns, levels) uint8 cell codes of the bytes of an ASCII maze file
+    levels = []
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line == b'#':
+            levels.append(lines)
+            lines = []
+        else:
+            lines.append(line)
+    
+    h = len(levels) # number of levels
+    n = len(levels[0]) # number of rows
+    m = min(map(len, levels[0])) # number of columns
+    
+    if any(len(line) != m for level in levels for line in level):
+        raise MazeError('(maze \'{0}\'): all maze rows must be the same length (shortest row has length {1})'.format(path, m))
+    
+    chars = np.frombuffer(b''.join(line for level in levels for line in level), dtype=np.uint8)
+    codes = _BYTE_CODES[chars]
+    if (codes == _UNKNOWN_CODE).any():
+        raise MazeError('unknown maze character(s) {0}'.format(
+            [chr(c) for c in np.unique(chars[codes == _UNKNOWN_CODE])]))
+    return np.ascontiguousarray(codes.reshape(h, n, m).transpose(1, 2, 0))
+
+def readCells(path):
+    """Returns the (rows, columns, levels) uint8 cell codes of an ASCII or binary maze file
+
+    Unlike loading a Maze, the borders, start and objectives are not checked, so
+    broken mazes can still be compared cell by cell.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(BINARY_MAZE_MAGIC)) == BINARY_MAZE_MAGIC:
+            return Maze(None, None, filepath=path).get_cells()
+        file.seek(0)
+        return _asciiCells(file.read(), path)
+
 class Maze:
-    def __init__(self, input_map, alien, granularity=DEFAULT_GRANULARITY, offsets=[0, 0, 0], filepath=None):
+    def __init__(self, input_map, alien, granularity=DEFAULT_GRANULARITY, offsets=[0, 0, 0], filepath=None, evaluator=None):
         """Initialize the Maze class
 
         Args:
-            input_map (array_like): input maze map of shape (num_cols, num_rows, num_levels)
+            input_map (array_like): input maze map of shape (num_cols, num_rows, num_levels), either ASCII
+                                    characters or uint8 cell codes. It is stored as a uint8 array of cell codes
             granularity (int): step size of the alien
             alien (Alien): the Alien instance
             offsets (list): list of offsets to make the maze start at (0,0,0) Ignore for this mp
             filepath (str): file path to the ASCII maze
+            evaluator (callable): makes a lazy maze, whose input_map cells are all UNKNOWN_CODE.
+                                  evaluator(idx) returns the uint8 codes of an (N, 3) array of cell
+                                  indices, and is called for blocks of cells as they are first accessed
         """        
         self.states_explored = 0
+        # set to True to print every configuration space cell lookup
+        self.debug = False
+        self.__neighbor_table = None
+        self.__cell_listeners = []
+        self.__evaluator = None
         if filepath:
             self.granularity = 0
+            self.alien = None
             self.readFromFile(filepath)
             return
 
@@ -50,15 +143,29 @@ class Maze:
         self.offsets = offsets
         self.granularity = granularity
         self.alien = alien
-        self.__dimensions = [len(input_map), len(input_map[0]),len(input_map[0][0])]      
-        self.__map = input_map
-        for x in range(self.__dimensions[X]):
-            for y in range(self.__dimensions[Y]):
-                for shape in range(self.__dimensions[SHAPE]):  
-                    if self.__map[x][y][shape] == START_CHAR:
-                        self.__start = idxToConfig((x, y,shape), self.offsets, granularity,self.__alien)
-                    elif self.__map[x][y][shape] == OBJECTIVE_CHAR:
-                        self.__objective.append(idxToConfig((x, y,shape), self.offsets, granularity,self.__alien))
+        # shape name -> shape index, instead of the linear search configToIdx does
+        self.__shapes = tuple(alien.get_shapes())
+        self.__shape_index = {}
+        for shape_idx, shape in enumerate(self.__shapes):
+            self.__shape_index.setdefault(shape, shape_idx)
+        self.__cells = toCells(input_map)
+        self.__dimensions = list(self.__cells.shape)
+        # goals, walls and window of the map a transformed maze was built from, see transform.updateMaze
+        self.goals = self.walls = self.window = None
+        if evaluator is not None:
+            self.__evaluator = evaluator
+            # the objectives are only listed when asked for, since that evaluates every cell
+            self.__objective = None
+            idx = configToIdx(alien.get_config(), self.offsets, granularity, alien)
+            if self.__code(*idx) != SPACE_CODE:
+                raise NoStartError("Maze has no start")
+            self.__cells[idx] = START_CODE
+            self.__start = idxToConfig(idx, self.offsets, granularity, alien)
+            return
+        for x, y, shape in np.argwhere(self.__cells == START_CODE).tolist():
+            self.__start = idxToConfig((x, y,shape), self.offsets, granularity,self.__alien)
+        for x, y, shape in np.argwhere(self.__cells == OBJECTIVE_CODE).tolist():
+            self.__objective.append(idxToConfig((x, y,shape), self.offsets, granularity,self.__alien))
 
         if not self.__start:
             # raise SystemExit
@@ -67,74 +174,112 @@ class Maze:
         if not self.__objective:
             raise NoObjectiveError("Maze has no objectives")
     
+    def __code(self, x, y, shape):
+        # code of a cell, evaluating its block first if this is a lazy maze that has not yet
+        code = self.__cells[x, y, shape]
+        if code == UNKNOWN_CODE:
+            x0 = x - x % LAZY_BLOCK_SIZE
+            y0 = y - y % LAZY_BLOCK_SIZE
+            block = self.__cells[x0:x0 + LAZY_BLOCK_SIZE, y0:y0 + LAZY_BLOCK_SIZE]
+            idx = np.argwhere(block == UNKNOWN_CODE)
+            block[tuple(idx.T)] = self.__evaluator(idx + (x0, y0, 0))
+            code = self.__cells[x, y, shape]
+        return code
+
+    def __evaluateAll(self):
+        # evaluate every cell of a lazy maze that was not accessed yet
+        if self.__evaluator is not None:
+            idx = np.argwhere(self.__cells == UNKNOWN_CODE)
+            for chunk in range(0, len(idx), 1 << 16):
+                part = idx[chunk:chunk + (1 << 16)]
+                self.__cells[tuple(part.T)] = self.__evaluator(part)
+            # every cell is known now, the maze is an eager one from here on
+            self.__evaluator = None
+
+    def isLazy(self):
+        """True if the cells of the maze are evaluated on first access"""
+        return self.__evaluator is not None
+
+    def getEvaluatedCells(self):
+        """Returns (number of evaluated cells, total number of cells), they are equal for an eager maze"""
+        return int(np.count_nonzero(self.__cells != UNKNOWN_CODE)), self.__cells.size
+
+    def getCode(self, cell_id):
+        """Code of the cell with the given flat id (see cellToId), evaluated first for a lazy maze"""
+        xy, shape = divmod(int(cell_id), self.__dimensions[SHAPE])
+        x, y = divmod(xy, self.__dimensions[Y])
+        return self.__code(x, y, shape)
+
     def __getitem__(self, index):
-        """Access data at index via self[index] instead of using self.__map"""
+        """Access data at index via self[index] instead of using self.__cells"""
         i, j, k = index
         if 0 <= i < self.__dimensions[X] and 0 <= j < self.__dimensions[Y] and 0 <= k < self.__dimensions[SHAPE]:
-            return self.__map[i][j][k]
+            return CELL_CHARS[self.__code(i, j, k)]
         else:
             raise IndexError('cell index ({0}, {1}, {2}) out of range'.format(i, j, k))
     
     def readFromFile(self, path):
-        """Construct a maze from file for Part 1
+        """Construct a maze from file for Part 1, either an ASCII maze or a binary one (see saveToBinaryFile)
 
         Args:
             path (string): file path
         """        
-        levels = []
-        with open(path) as file:
-            lines = []
-            for line in file.readlines():
-                if line:
-                    if line.strip() == '#':
-                        levels.append(lines)
-                        lines = []
-                    else:
-                        lines.append([c for c in line.strip()])
-                    
-        
-        # Stores copy of ASCII maze in self.__map as well as dimensions
-        h = len(levels) # number of levels
-        n = len(levels[0]) # number of rows
-        m = min(map(len, levels[0])) # number of columns
-        
-        if any(len(line) != m for line in levels[0]):
-            raise MazeError('(maze \'{0}\'): all maze rows must be the same length (shortest row has length {1})'.format(path, m))
-        
-        
-        self.__map = np.transpose(levels, (1, 2, 0)).tolist()
+        with open(path, 'rb') as file:
+            if file.read(len(BINARY_MAZE_MAGIC)) == BINARY_MAZE_MAGIC:
+                return self.readFromBinaryFile(path)
+            file.seek(0)
+            text = file.read()
+
+        self.__cells = _asciiCells(text, path)
+        n, m, h = self.__cells.shape
         self.__dimensions = [n, m, h]
 
-        if any(self[x] != WALL_CHAR for x in chain(
-            ((    0, j, k) for j in range(m) for k in range(h)), 
-            ((n - 1, j, k) for j in range(m) for k in range(h)), 
-            ((i,     0, k) for i in range(n) for k in range(h)), 
-            ((i, m - 1, k) for i in range(n) for k in range(h)))):
+        cells = self.__cells
+        if ((cells[0] != WALL_CODE).any() or (cells[n - 1] != WALL_CODE).any() or
+            (cells[:, 0] != WALL_CODE).any() or (cells[:, m - 1] != WALL_CODE).any()):
             raise MazeError('(maze \'{0}\'): maze borders must only contain `wall` cells (\'{1}\')'.format(path, WALL_CHAR))
         if n < 3 or m < 3:
             raise MazeError('(maze \'{0}\'): maze dimensions ({1}, {2}) must be at least (3, 3)'.format(path, n, m))
         
         # Checks if only 1 start, if so, stores index in self.__start
-        self.__start  = None 
-        for x in ((i, j, k) 
-            for i in range(n) 
-            for j in range(m) 
-            for k in range(h) if self[i, j, k] == START_CHAR):
-            if self.__start is None:
-                self.__start = x
-            elif type(self.__start) is int:
-                self.__start += 1 
-            else: 
-                self.__start  = 2
-        if type(self.__start) is int or self.__start is None:
+        starts = np.argwhere(cells == START_CODE)
+        if len(starts) != 1:
             raise MazeError('(maze \'{0}\'): maze must contain exactly one `start` cell (\'{1}\') (found {2})'.format(
-                path, START_CHAR, 0 if self.__start is None else self.__start))
+                path, START_CHAR, len(starts)))
+        self.__start = tuple(starts[0].tolist())
         
         # Stores waypoint indices in self.__objective
-        self.__objective = tuple((i, j, k) 
-            for i in range(n) 
-            for j in range(m) 
-            for k in range(h) if self[i, j, k] == OBJECTIVE_CHAR)
+        self.__objective = tuple(map(tuple, np.argwhere(cells == OBJECTIVE_CODE).tolist()))
+
+    def readFromBinaryFile(self, path, mmap=True):
+        """Construct a maze for Part 1 from a binary maze file written by saveToBinaryFile
+
+        The start and objectives come from the header, so the cells are not scanned.
+
+        Args:
+            path (string): file path
+            mmap (bool, optional): open the cells as a read-only np.memmap instead of reading them in. Defaults to True.
+        """
+        with open(path, 'rb') as file:
+            header = file.read(_BINARY_HEADER.size)
+            if len(header) != _BINARY_HEADER.size or header[:len(BINARY_MAZE_MAGIC)] != BINARY_MAZE_MAGIC:
+                raise MazeError('(maze \'{0}\'): not a binary maze file'.format(path))
+            magic, version, n, m, h, granularity, num_objectives, data_offset = _BINARY_HEADER.unpack(header)
+            if version != BINARY_MAZE_VERSION:
+                raise MazeError('(maze \'{0}\'): unsupported binary maze version {1}'.format(path, version))
+            indices = np.fromfile(file, dtype='<i4', count=3 * (num_objectives + 1)).reshape(-1, 3)
+            file.seek(0, 2)
+            if file.tell() != data_offset + n * m * h:
+                raise MazeError('(maze \'{0}\'): file size does not match dimensions ({1}, {2}, {3})'.format(path, n, m, h))
+
+        if mmap:
+            self.__cells = np.memmap(path, dtype=np.uint8, mode='r', offset=data_offset, shape=(n, m, h))
+        else:
+            self.__cells = np.fromfile(path, dtype=np.uint8, offset=data_offset).reshape(n, m, h)
+        self.__dimensions = [n, m, h]
+        self.granularity = granularity
+        self.__start = tuple(indices[0].tolist())
+        self.__objective = tuple(map(tuple, indices[1:].tolist()))
 
     def getChar(self, x, y, shape, part1=False):
         """Getting underlying character at the specified coordinate
@@ -151,12 +296,16 @@ class Maze:
         if part1:
             i, j, k = x, y, shape
             return self[i, j, k]
-        oldx = x
-        oldy = y
-        oldshape = shape
-        x, y,shape = configToIdx((x,y,shape), self.offsets, self.granularity,self.alien)
-        print('getting char from {} {} {}, mapped to {} {} {} and is {}'.format(oldx,oldy,oldshape,x,y,shape,self.__map[x][y][shape]))
-        return self.__map[x][y][shape]
+        i, j, k = self.__configToCell(x, y, shape)
+        char = CELL_CHARS[self.__code(i, j, k)]
+        if self.debug:
+            print('getting char from {} {} {}, mapped to {} {} {} and is {}'.format(x,y,shape,i,j,k,char))
+        return char
+
+    def __configToCell(self, x, y, shape):
+        # configToIdx in one step: same truncating division, shape index from a dict
+        return (int((x - self.offsets[X]) / self.granularity), int((y - self.offsets[Y]) / self.granularity),
+                self.__shape_index[shape])
 
     # Returns True if the given position is the location of a wall
     def isWall(self, x, y, shape, ispart1=False):
@@ -179,7 +328,15 @@ class Maze:
 
     # Returns the list of objective positions of the maze
     def getObjectives(self):
-        return copy.deepcopy(self.__objective)
+        return copy.deepcopy(self.__getObjectives())
+
+    def __getObjectives(self):
+        # the objectives of a configuration space maze are listed again after applyCells changed them
+        if self.__objective is None:
+            self.__evaluateAll()
+            self.__objective = [idxToConfig((x, y, shape), self.offsets, self.granularity, self.alien)
+                                for x, y, shape in np.argwhere(self.__cells == OBJECTIVE_CODE).tolist()]
+        return self.__objective
 
     def setObjectives(self, objectives):
         self.__objective = objectives
@@ -202,12 +359,14 @@ class Maze:
                j >= 0 and j < self.getDimensions()[Y] and \
                0 <= k < self.getDimensions()[SHAPE] and not self.isWall(i, j, k, True)
 
-        old_x,old_y,old_shape = x,y,shape
-        x, y,shape = configToIdx((x,y,shape), self.offsets, self.granularity, self.alien)
-
-        return x >= 0 and x < self.getDimensions()[X] and \
-               y >= 0 and y < self.getDimensions()[Y] and \
-               0 <= shape < self.getDimensions()[SHAPE] and not self.isWall(old_x,old_y,old_shape)
+        i, j, k = self.__configToCell(x, y, shape)
+        dims = self.__dimensions
+        if not (0 <= i < dims[X] and 0 <= j < dims[Y] and 0 <= k < dims[SHAPE]):
+            return False
+        if self.debug:
+            # through getChar, which traces the lookup
+            return not self.isWall(x, y, shape)
+        return self.__code(i, j, k) != WALL_CODE
         
     def getNeighbors(self, x, y, shape, part1=False):
         """Returns list of neighboing squares that can be moved to from the given coordinate
@@ -233,26 +392,130 @@ class Maze:
             (i, j, k + 1)) 
             if self.isValidMove( * x, True ))
 
-        possibleNeighbors = [
-            (x + self.granularity, y,shape),
-            (x - self.granularity, y,shape),
-            (x, y + self.granularity,shape),
-            (x, y - self.granularity,shape),
-            (x,y,self.alien.get_shapes().index(shape) -1),
-            (x,y,self.alien.get_shapes().index(shape) +1)            
-        ]
-        neighbors = []
-        for a, b,c in possibleNeighbors:
-            if(type(c) == int):
-                if(0<= c < len(self.alien.get_shapes())):
-                    c = self.alien.get_shapes()[c]
-                    if(self.isValidMove(a,b,c)):
-                        neighbors.append((a,b,c))
-                else:
-                    continue
-            elif self.isValidMove(a,b,c):
-                neighbors.append((a,b,c))
-        return neighbors
+        g = self.granularity
+        k = self.__shape_index[shape]
+        candidates = [(x + g, y, shape), (x - g, y, shape), (x, y + g, shape), (x, y - g, shape)]
+        if k > 0:
+            candidates.append((x, y, self.__shapes[k - 1]))
+        if k + 1 < len(self.__shapes):
+            candidates.append((x, y, self.__shapes[k + 1]))
+        return [c for c in candidates if self.isValidMove(c[0], c[1], c[2])]
+
+    def cellToId(self, x, y, shape, part1=False):
+        """Flat id of a cell, as used by the neighbor table
+
+        Args:
+            x (int): x
+            y (int): y
+            shape (int): shape idx
+            part1 (bool, optional): True if used for part 1. Defaults to False.
+
+        Returns:
+            int: row-major index of the cell in the (x, y, shape) grid
+        """
+        if not part1:
+            x, y, shape = self.__configToCell(x, y, shape)
+        return (x * self.__dimensions[Y] + y) * self.__dimensions[SHAPE] + shape
+
+    def idToCell(self, cell_id, part1=False):
+        """Inverse of cellToId, returns the cell in the same format getNeighbors uses"""
+        x, rest = divmod(int(cell_id), self.__dimensions[Y] * self.__dimensions[SHAPE])
+        y, shape = divmod(rest, self.__dimensions[SHAPE])
+        if part1:
+            return (x, y, shape)
+        return idxToConfig((x, y, shape), self.offsets, self.granularity, self.alien)
+
+    def buildNeighborTable(self):
+        """Precompute the neighbors of every cell as a CSR table over flat cell ids
+
+        The neighbors of cell id c are indices[offsets[c]:offsets[c+1]], listed in the
+        same order as getNeighbors returns them. The table only depends on the wall
+        grid, so it serves both the part 1 and the configuration space modes.
+
+        Returns:
+            tuple: (offsets, indices) int64 arrays
+        """
+        self.__evaluateAll()
+        free = self.__cells != WALL_CODE
+        ids = np.arange(free.size).reshape(free.shape)
+        # +x, -x, +y, -y, previous shape, next shape, as in getNeighbors
+        steps = ((X, 1), (X, -1), (Y, 1), (Y, -1), (SHAPE, -1), (SHAPE, 1))
+        targets = np.full(free.shape + (len(steps),), -1, dtype=np.int64)
+        for n, (axis, step) in enumerate(steps):
+            src = [slice(None)] * 3
+            dst = [slice(None)] * 3
+            if step > 0:
+                src[axis], dst[axis] = slice(0, -step), slice(step, None)
+            else:
+                src[axis], dst[axis] = slice(-step, None), slice(0, step)
+            src, dst = tuple(src), tuple(dst)
+            targets[src + (n,)] = np.where(free[dst], ids[dst], -1)
+        targets = targets.reshape(free.size, len(steps))
+        valid = targets >= 0
+        offsets = np.zeros(free.size + 1, dtype=np.int64)
+        np.cumsum(valid.sum(axis=1), out=offsets[1:])
+        self.__neighbor_table = (offsets, targets[valid])
+        return self.__neighbor_table
+
+    def getNeighborTable(self):
+        """Returns the (offsets, indices) neighbor table, building it on first use"""
+        if self.__neighbor_table is None:
+            self.buildNeighborTable()
+        return self.__neighbor_table
+
+    def getNeighborIds(self, cell_id):
+        """Table based getNeighbors: returns the flat ids of the neighbors of a flat cell id
+
+        A lazy maze has no table, its neighbors are computed (and evaluated) on the fly, in the same order.
+        """
+        self.states_explored += 1
+        if self.__evaluator is not None:
+            x, y, shape = self.idToCell(cell_id, True)
+            step_y = self.__dimensions[SHAPE]
+            step_x = self.__dimensions[Y] * step_y
+            candidates = ((x + 1 < self.__dimensions[X], cell_id + step_x, (x + 1, y, shape)),
+                          (x > 0, cell_id - step_x, (x - 1, y, shape)),
+                          (y + 1 < self.__dimensions[Y], cell_id + step_y, (x, y + 1, shape)),
+                          (y > 0, cell_id - step_y, (x, y - 1, shape)),
+                          (shape > 0, cell_id - 1, (x, y, shape - 1)),
+                          (shape + 1 < self.__dimensions[SHAPE], cell_id + 1, (x, y, shape + 1)))
+            return [n for inside, n, cell in candidates if inside and self.__code(*cell) != WALL_CODE]
+        offsets, indices = self.getNeighborTable()
+        return indices[offsets[cell_id]:offsets[cell_id + 1]]
+
+    def applyCells(self, x0, y0, codes):
+        """Overwrite a box of cells of a configuration space maze, for edits of its map (see transform.updateMaze)
+
+        Args:
+            x0 (int): x index of the first column of the box
+            y0 (int): y index of the first row of the box
+            codes (np.ndarray): uint8 cell codes of the box, indexed [x, y, shape] and covering every shape
+
+        Returns:
+            np.ndarray: flat ids (see cellToId) of the cells whose code changed
+        """
+        self.__evaluateAll()
+        box = (slice(x0, x0 + codes.shape[X]), slice(y0, y0 + codes.shape[Y]))
+        changed = np.argwhere(self.__cells[box] != codes)
+        if not len(changed):
+            return np.zeros(0, dtype=np.int64)
+        if ((self.__cells[box] == OBJECTIVE_CODE) != (codes == OBJECTIVE_CODE)).any():
+            self.__objective = None
+        self.__cells[box] = codes
+        # the neighbor table is built again on its next use
+        self.__neighbor_table = None
+        changed += (x0, y0, 0)
+        changed = (changed[:, X] * self.__dimensions[Y] + changed[:, Y]) * self.__dimensions[SHAPE] + changed[:, SHAPE]
+        for listener in self.__cell_listeners:
+            listener(changed)
+        return changed
+
+    def addCellListener(self, listener):
+        """Register listener(cell_ids) to be called with the flat ids of the cells applyCells changed"""
+        self.__cell_listeners.append(listener)
+
+    def removeCellListener(self, listener):
+        self.__cell_listeners.remove(listener)
 
     def saveToFile(self, filename): 
         """Save the maze to file
@@ -263,50 +526,211 @@ class Maze:
         Returns:
             bool: True if successfully saved
         """               
-        outputMap = ""
-        for shape in range(self.__dimensions[2]):
-            for y in range(self.__dimensions[1]):
-                for x in range(self.__dimensions[0]):
-                    outputMap += self.__map[x][y][shape]
-                outputMap += "\n"
-            outputMap += "#\n"
+        # one row of characters per line, with the rows of each level followed by '#'
+        levels = _CHAR_BYTES[self.__rowColumnLevelCells().transpose(2, 0, 1)]
+        h, n, m = levels.shape
+        lines = np.full((h, n, m + 1), ord('\n'), dtype=np.uint8)
+        lines[:, :, :m] = levels
+        with open(filename, 'wb') as f:
+            for level in lines:
+                f.write(level.tobytes())
+                f.write(b'#\n')
 
-        with open(filename, 'w') as f:
-            f.write(outputMap)
+        return True
+
+    def saveToBinaryFile(self, filename):
+        """Save the maze to a binary maze file
+
+        The file holds a fixed size header (magic, version, dimensions, granularity, number of
+        objectives), the start and objective indices as int32 triples, then the raw uint8
+        cell codes, aligned to BINARY_MAZE_ALIGNMENT so they can be opened with np.memmap.
+        Cells are stored in the (row, col, level) order of the ASCII format, so both formats
+        load into the same Part 1 maze.
+
+        Args:
+            filename (string): file name
+
+        Returns:
+            bool: True if successfully saved
+        """
+        cells = self.__rowColumnLevelCells()
+        indices = [self.__start] + list(self.__getObjectives())
+        if not self.__isPart1():
+            # configuration space mazes keep configs, stored as (row, col, level) = (y, x, shape) indices
+            indices = [(y, x, shape) for x, y, shape in
+                       (configToIdx(config, self.offsets, self.granularity, self.alien) for config in indices)]
+            indices = indices[:1] + sorted(indices[1:])
+        indices = np.array(indices, dtype='<i4').reshape(-1, 3)
+        data_offset = -(-(_BINARY_HEADER.size + indices.nbytes) // BINARY_MAZE_ALIGNMENT) * BINARY_MAZE_ALIGNMENT
+        with open(filename, 'wb') as f:
+            f.write(_BINARY_HEADER.pack(BINARY_MAZE_MAGIC, BINARY_MAZE_VERSION, *cells.shape,
+                                        self.granularity, len(indices) - 1, data_offset))
+            f.write(indices.tobytes())
+            f.write(bytes(data_offset - _BINARY_HEADER.size - indices.nbytes))
+            f.write(np.ascontiguousarray(cells).tobytes())
 
         return True
-            
 
-    def isValidPath(self, path):
+    def __isPart1(self):
+        # mazes read from a file hold (row, col, level) indices, transformed ones hold configs
+        return self.alien is None
+
+    def __rowColumnLevelCells(self):
+        # cells in the (row, col, level) order of the maze files
+        self.__evaluateAll()
+        return self.__cells if self.__isPart1() else self.__cells.transpose(Y, X, SHAPE)
+
+    def isValidPath(self, path, part1=False):
         """Check if the path is valid
 
         Args:
             path (list): path of travelled cells
+            part1 (bool, optional): True if used for part 1. Defaults to False.
 
         Returns:
             string: detailed description on if the path is valid
         """        
-        # First, check whether it moves single hop
+        # First, check whether it moves single hop: one step in x or y, or one shape change
+        step = 1 if part1 else self.granularity
         for i in range(1, len(path)):
             prev = path[i-1]
             cur = path[i]
-            dist = abs(prev[0]-cur[0]) + abs(prev[1]-cur[1]) #+ abs(prev[2] - cur[2])
-            if dist != self.granularity:
-                return "Not single hop"
-            if(abs(prev[2] - cur[2]) > 1):
+            dist = abs(prev[0]-cur[0]) + abs(prev[1]-cur[1])
+            if part1:
+                shape_change = abs(prev[2] - cur[2])
+            else:
+                shape_change = abs(self.alien.get_shapes().index(prev[2]) - self.alien.get_shapes().index(cur[2]))
+            if(shape_change > 1):
                 return "Illegal Shape Transformation"
+            if (dist, shape_change) not in ((step, 0), (0, 1)):
+                return "Not single hop"
 
         # Second, check whether it is valid move
         for pos in path:
-            if not self.isValidMove(pos[0], pos[1],pos[2]):
+            if not self.isValidMove(pos[0], pos[1],pos[2], part1):
                 return "Not valid move"
 
 
         # Last, check whether it ends up at one of goals
-        if not path[-1] in self.__objective:
+        if not self.isObjective(path[-1][0], path[-1][1], path[-1][2], part1):
             return "Last position is not a goal state"
 
         return "Valid"
 
     def get_map(self):
-        return self.__map
+        """Returns the map as nested lists of ASCII characters, indexed [x][y][shape]"""
+        self.__evaluateAll()
+        return np.array(CELL_CHARS)[self.__cells].tolist()
+
+    def get_cells(self):
+        """Returns the uint8 array of cell codes backing the maze, indexed [x, y, shape]. A lazy maze evaluates all its cells first"""
+        self.__evaluateAll()
+        return self.__cells
+
+
+if __name__ == '__main__':
+    import argparse
+    import contextlib
+    import glob
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(description='maze memory, neighbor table and load time benchmarks')
+    parser.add_argument('--convert', dest='convert', nargs='+', default=None, metavar='MAZE',
+                        help='convert each ASCII maze to a binary maze next to it ('+BINARY_MAZE_EXTENSION+') and each binary maze back to ASCII instead')
+    args = parser.parse_args()
+    if args.convert:
+        for path in args.convert:
+            root, extension = os.path.splitext(path)
+            if extension == BINARY_MAZE_EXTENSION:
+                binaryToAscii(path, root + '.txt')
+                print('{} -> {}'.format(path, root + '.txt'))
+            else:
+                asciiToBinary(path, root + BINARY_MAZE_EXTENSION)
+                print('{} -> {}'.format(path, root + BINARY_MAZE_EXTENSION))
+        raise SystemExit
+
+    # memory held by a map stored as nested lists of characters versus the uint8 cell array
+    print('{:<40} {:>14} {:>14} {:>8}'.format('maze', 'lists (bytes)', 'uint8 (bytes)', 'saving'))
+    for path in sorted(glob.glob('./mazes/gt_Test*_granularity_2.txt')):
+        maze = Maze(None, None, filepath=path)
+        tracemalloc.start()
+        nested = maze.get_map()
+        list_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        cell_bytes = maze.get_cells().nbytes
+        print('{:<40} {:>14} {:>14} {:>7.0f}x'.format(path, list_bytes, cell_bytes, list_bytes / cell_bytes))
+
+    def expansion_rates(maze, part1):
+        # expand every free cell once with getNeighbors and once with the neighbor table
+        cells = [tuple(c) for c in np.argwhere(maze.get_cells() != WALL_CODE).tolist()]
+        if not part1:
+            cells = [idxToConfig(c, maze.offsets, maze.granularity, maze.alien) for c in cells]
+        start = time.perf_counter()
+        for c in cells:
+            maze.getNeighbors(*c, part1)
+        old = time.perf_counter() - start
+        start = time.perf_counter()
+        maze.buildNeighborTable()
+        build = time.perf_counter() - start
+        ids = [maze.cellToId(*c, part1) for c in cells]
+        start = time.perf_counter()
+        for c in ids:
+            maze.getNeighborIds(c)
+        new = time.perf_counter() - start
+        return len(cells), build, len(cells) / old, len(cells) / new
+
+    print('\n{:<40} {:>8} {:>11} {:>16} {:>16}'.format('maze', 'nodes', 'build (ms)', 'getNeighbors/s', 'table/s'))
+    benchmarks = [(path, Maze(None, None, filepath=path), True)
+                  for path in sorted(glob.glob('./mazes/*-3d')) + sorted(glob.glob('./mazes/gt_*_granularity_2.txt'))]
+    from mapconfig import loadMap
+    from transform import transformToMaze
+    test2 = loadMap('./maps/test_config.txt', 'Test2')
+    benchmarks.append(('Test2 config space, granularity 2',
+                       transformToMaze(test2.makeAlien(), test2.getGoals(), test2.getWalls(), test2.window, 2), False))
+    for name, maze, part1 in benchmarks:
+        nodes, build, old_rate, new_rate = expansion_rates(maze, part1)
+        print('{:<40} {:>8} {:>11.2f} {:>16.0f} {:>16.0f}'.format(name, nodes, build*1e3, old_rate, new_rate))
+
+    # config mode lookups with the debug trace on, which is how every lookup ran before it was behind maze.debug
+    from search import astar
+    maze = benchmarks[-1][1]
+    print('\n{:<10} {:>16} {:>12} {:>8}'.format('debug', 'getNeighbors/s', 'astar (ms)', 'length'))
+    for debug in (True, False):
+        maze.debug = debug
+        configs = [idxToConfig(tuple(c), maze.offsets, maze.granularity, maze.alien)
+                   for c in np.argwhere(maze.get_cells() != WALL_CODE).tolist()]
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for c in configs:
+                maze.getNeighbors(*c)
+            rate = len(configs) / (time.perf_counter() - start)
+            start = time.perf_counter()
+            path = astar(maze)
+            astar_time = time.perf_counter() - start
+        print('{:<10} {:>16.0f} {:>12.1f} {:>8}'.format(str(debug), rate, astar_time*1e3, len(path)))
+    maze.debug = False
+
+    # load times of the ASCII mazes against their binary conversions, read in or memory-mapped
+    def load_time(load, repeats=20):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            maze = load()
+        return (time.perf_counter() - start) / repeats, maze
+
+    print('\n{:<40} {:>11} {:>12} {:>12} {:>12} {:>12}'.format(
+        'maze', 'ascii bytes', 'binary bytes', 'ascii (ms)', 'binary (ms)', 'memmap (ms)'))
+    with tempfile.TemporaryDirectory() as directory:
+        for path in sorted(glob.glob('./mazes/gt_*_granularity_2.txt')):
+            binary_path = os.path.join(directory, os.path.basename(path) + BINARY_MAZE_EXTENSION)
+            asciiToBinary(path, binary_path)
+            ascii_time, ascii_maze = load_time(lambda: Maze(None, None, filepath=path))
+            memmap_time, binary_maze = load_time(lambda: Maze(None, None, filepath=binary_path))
+            read_time, _ = load_time(lambda: binary_maze.readFromBinaryFile(binary_path, mmap=False))
+            for maze in (binary_maze, Maze(None, None, filepath=binary_path)):
+                assert np.array_equal(ascii_maze.get_cells(), maze.get_cells())
+                assert (ascii_maze.getStart(), ascii_maze.getObjectives()) == (maze.getStart(), maze.getObjectives())
+            print('{:<40} {:>11} {:>12} {:>12.3f} {:>12.3f} {:>12.3f}'.format(
+                path, os.path.getsize(path), os.path.getsize(binary_path), ascii_time*1e3, read_time*1e3, memmap_time*1e3))
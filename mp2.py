@@ -14,16 +14,18 @@ This file contains the main application that is run for this MP.
 import pygame
 import sys
 import argparse
-import configparser
 import copy
 
 from pygame.locals import *
 from alien import Alien
-from transform import transformToMaze
-from search import search
+from mapconfig import loadMap
+from transform import transformToMaze, MazeCache, planCoarseToFine
+from search import search, SEARCH_METHODS
+from trajectory import smooth_path, describe
 from const import *
 from util import *
 from geometry import *
+import profiling
 import time
 
 class Application:
@@ -31,27 +33,24 @@ class Application:
 	def __init__(self, configfile, map_name, human=True, fps=DEFAULT_FPS):
 		self.running = False
 		self.displaySurface = None
-		self.config = configparser.ConfigParser()
-		self.config.read(configfile)
 		self.fps = fps
 		self.__human = human
 		self.clock = pygame.time.Clock()   
 		self.trajectory = []   
-		lims = eval(self.config.get(map_name, 'Window'))
-		# print(lims)
-		self.alien_limits = [(0,int(lims[0])),(0,int(lims[1]))]
 		# Parse config file
+		map_config = loadMap(configfile, map_name)
+		lims = map_config.window
+		self.alien_limits = [(0,int(lims[0])),(0,int(lims[1]))]
 		self.windowTitle = "CS440 MP2 Shapeshifting Alien"
-		self.window = eval(self.config.get(map_name, 'Window'))
-		self.centroid = eval(self.config.get(map_name, 'StartPoint'))
-		self.widths = eval(self.config.get(map_name, 'Widths'))
+		self.window = map_config.window
+		self.centroid = list(map_config.start)
+		self.widths = list(map_config.widths)
 		self.alien_shape = 'Ball'
-		self.lengths = eval(self.config.get(map_name, 'Lengths'))
+		self.lengths = list(map_config.lengths)
 		self.alien_shapes = ['Horizontal','Ball','Vertical']
-		self.obstacles = eval(self.config.get(map_name, 'Obstacles'))
-		boundary = [(0,0,0,lims[1]),(0,0,lims[0],0),(lims[0],0,lims[0],lims[1]),(0,lims[1],lims[0],lims[1])]
-		self.obstacles.extend(boundary)
-		self.goals = eval(self.config.get(map_name, 'Goals'))
+		self.obstacles = map_config.getWalls()
+		self.wall_index = WallIndex(self.obstacles)
+		self.goals = map_config.getGoals()
 		self.alien_color = BLACK
 		self.alien = Alien(self.centroid,self.lengths,self.widths,self.alien_shapes,self.alien_shape,self.window)
 
@@ -66,15 +65,26 @@ class Application:
 		pygame.display.set_caption(self.windowTitle)
 		self.running = True
 
+	def get_alien_colors(self, configs):
+		configs = configsToArray(configs, self.alien_shapes)
+		touch_wall = does_alien_touch_wall_batch(configs, self.wall_index, self.granularity, self.lengths, self.widths, self.alien_shapes)
+		in_window = is_alien_within_window_batch(configs, self.window, self.granularity, self.lengths, self.widths, self.alien_shapes)
+		touch_goal = does_alien_touch_goal_batch(configs, self.goals, self.lengths, self.widths, self.alien_shapes)
+		return [RED if wall or not window else GREEN if goal else BLACK
+				for wall, window, goal in zip(touch_wall, in_window, touch_goal)]
+
 	def get_alien_color(self):
-		if does_alien_touch_wall(self.alien, self.obstacles,self.granularity) or not is_alien_within_window(self.alien, self.window,self.granularity):
-			self.alien_color = RED
-		elif does_alien_touch_goal(self.alien,self.goals):
-			self.alien_color = GREEN
-		else: 
-			self.alien_color = BLACK
+		self.alien_color = self.get_alien_colors([self.alien.get_config()])[0]
+
+	def smoothTrajectory(self, path):
+		# waypoints of the path, keeping the configs that touch a goal
+		touch_goal = does_alien_touch_goal_batch(configsToArray(path, self.alien_shapes), self.goals, self.lengths, self.widths, self.alien_shapes)
+		keep = [config for config, goal in zip(path, touch_goal) if goal]
+		waypoints, stats = smooth_path(path, self.wall_index, self.granularity, self.lengths, self.widths, self.alien_shapes, keep)
+		print("Smoothed the path: " + describe(stats))
+		return waypoints
 	# Once the application is initiated, execute is in charge of drawing the game and dealing with the game loop
-	def execute(self, searchMethod, granularity, trajectory, saveMaze):    
+	def execute(self, searchMethod, granularity, trajectory, saveMaze, workers=1, cache=True, coarse_granularity=0, profile=None, smooth=False):    
 		self.granularity = granularity    
 		self.initialize()
 		if not self.running:
@@ -86,16 +96,38 @@ class Application:
 		#     currAngle[i] = self.arm.getArmAngle()[i]
 		self.gameLoop()        
 
-		if not self.__human:
+		maze = None
+		if not self.__human and coarse_granularity:
+			print("Planning from granularity {} down to {}...".format(coarse_granularity, granularity))
+			path, stats = planCoarseToFine(self.alien, self.goals, self.wall_index, self.window, granularity, coarse_granularity, searchMethod=searchMethod)
+			print("Evaluated {} of {} cells{}".format(stats['evaluated_cells'], stats['total_cells'], " (full search fallback)" if stats['fallback'] else ""))
+			if profile:
+				profiling.dump(profile)
+			if path is None:
+				print("No path found!")
+			else:
+				self.trajectory = self.smoothTrajectory(path) if smooth else path
+				self.gameLoop()
+				print("Done!")
+				self.drawTrajectory(final = True)
+		elif not self.__human:
 			print("Transforming a map configuration to a maze...")
-			maze = transformToMaze(self.alien, self.goals, self.obstacles, self.window, granularity)
+			if cache:
+				maze_cache = MazeCache()
+				maze = maze_cache.transformToMaze(self.alien, self.goals, self.wall_index, self.window, granularity, workers)
+				print(maze_cache.report())
+			else:
+				maze = transformToMaze(self.alien, self.goals, self.wall_index, self.window, granularity, workers)
 			print("Done!")
 			print("Searching the path...")
 			path = search(maze, searchMethod)
+			print("States explored: {}".format(maze.states_explored))
+			if profile:
+				profiling.dump(profile)
 			if path is None:
 				print("No path found!")
 			else:
-				self.trajectory = path
+				self.trajectory = self.smoothTrajectory(path) if smooth else path
 				self.gameLoop()
 				print("Done!")
 				if saveMaze and not self.__human:
@@ -152,7 +184,7 @@ class Application:
 				#     raise SystemExit
 
 
-		if saveMaze and not self.__human:
+		if saveMaze and maze is not None:
 			maze.saveToFile(saveMaze)
 			
 
@@ -187,15 +219,16 @@ class Application:
 	def drawTrajectory(self,final = False):
 		cnt = 1
 		if final:
+			colors = self.get_alien_colors(self.trajectory)
 			while(True):
-				for config in self.trajectory: 
+				for config, color in zip(self.trajectory, colors): 
 					pygame.event.pump()            
 					keys = pygame.key.get_pressed()
 					if(keys[K_ESCAPE]):
 						pygame.quit()
 						sys.exit()
 					self.alien.set_alien_config(config)
-					self.get_alien_color()
+					self.alien_color = color
 					self.gameLoop()
 					time.sleep(0.05)
 				time.sleep(2)
@@ -241,7 +274,7 @@ if __name__ == "__main__":
 	parser.add_argument('--map', dest="map_name", type=str, default = "BasicMap",
 						help='configuration filename - default BasicMap')
 	parser.add_argument('--method', dest="search", type=str, default = "bfs", 
-						choices = ["bfs"],
+						choices = sorted(SEARCH_METHODS),
 						help='search method - default bfs')
 	parser.add_argument('--human', default = False, action = "store_true",
 						help='flag for human playable - default False')
@@ -253,7 +286,19 @@ if __name__ == "__main__":
 						help='leave footprint of rotation trajectory in every x moves - default 0')
 	parser.add_argument('--save-maze', dest="saveMaze", type=str, default = None, 
 						help='save the contructed maze to maze file - default not saved')
+	parser.add_argument('--workers', dest="workers", type=int, default = 1,
+						help='number of processes used to build the maze - default 1')
+	parser.add_argument('--coarse-granularity', dest="coarse_granularity", type=int, default = 0,
+						help='plan on this granularity first and refine in a corridor around its path - default off')
+	parser.add_argument('--profile', dest="profile", type=str, default = None,
+						help='record profiling counters and timers and dump them to this JSON file - default off')
+	parser.add_argument('--no-cache', dest="cache", default = True, action = "store_false",
+						help='rebuild the maze instead of reusing the one cached in '+MAZE_CACHE_DIR)
+	parser.add_argument('--smooth', dest="smooth", default = False, action = "store_true",
+						help='replay the path as straight moves between waypoints instead of single steps - default False')
 	
 	args = parser.parse_args()
+	if args.profile:
+		profiling.enable()
 	app = Application(args.configfile, args.map_name, args.human, args.fps)
-	app.execute(args.search, args.granularity, args.trajectory, args.saveMaze)
+	app.execute(args.search, args.granularity, args.trajectory, args.saveMaze, args.workers, args.cache, args.coarse_granularity, args.profile, args.smooth)
@@ -23,6 +23,7 @@ import pygame
 
 from maze import Maze
 import search
+import profiling
 
 class gradient:
     def __init__(self, start, end):
@@ -62,7 +63,7 @@ class Application:
         else:
             self.gradient = gradient((255, 0, 0), (0, 255, 0))
 
-    def run(self, filepath, mode, save):
+    def run(self, filepath, mode, save, profile = None):
         self.maze   = Maze(None, None, filepath=filepath)
         h, w, l = self.maze.getDimensions()
         self.width = w
@@ -79,6 +80,8 @@ class Application:
             path            = getattr(search, mode)(self.maze, True)
             states_explored = self.maze.states_explored
             time_total      = time.time() - time_start   
+            if profile:
+                profiling.dump(profile)
             if not path:
                 print("No solution found!")
                 return
@@ -196,7 +199,7 @@ if __name__ == "__main__":
     parser.add_argument('path',
                         help = 'path to maze file')
     parser.add_argument('--search', dest = 'search', type = str, default = 'bfs',
-                        choices = ('bfs'), 
+                        choices = sorted(search.SEARCH_METHODS), 
                         help = 'search method')
     parser.add_argument('--scale',  dest = 'scale', type = int, default = 20,
                         help = 'display scale')
@@ -206,12 +209,17 @@ if __name__ == "__main__":
                         help = 'run in human-playable mode')
     parser.add_argument('--save', dest = 'save', type = str, default = None,
                         help = 'save output to image file')
+    parser.add_argument('--profile', dest = 'profile', type = str, default = None,
+                        help = 'record profiling counters and timers and dump them to this JSON file')
     parser.add_argument('--altcolor', dest = 'altcolor', default = False, action = 'store_true',
                         help = 'view in an alternate color scheme')
 
     arguments   = parser.parse_args()
+    if arguments.profile:
+        profiling.enable()
     application = Application(arguments.human, arguments.scale, arguments.fps, arguments.altcolor)
     application.run(
         filepath    = arguments.path, 
         mode        = arguments.search, 
-        save        = arguments.save)
\ No newline at end of file
+        save        = arguments.save,
+        profile     = arguments.profile)
\ No newline at end of file
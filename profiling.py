@@ -0,0 +1,95 @@
+# profiling.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the counters and timers that geometry, transform and search
+report to. Recording is off until enable() is called: every call site checks
+profiling.enabled first, so a disabled hook costs one attribute lookup.
+
+Names are dotted, e.g. 'geometry.wall_checks.Ball' or 'search.bfs.expansions'.
+Counts made in transformToMaze worker processes (workers > 1) stay in those
+processes and are not reported.
+"""
+
+import json
+import time
+
+enabled = False
+
+_counters = {}
+_maxima = {}
+# name -> [calls, seconds]
+_timers = {}
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+def disable():
+    enable(False)
+
+def reset():
+    _counters.clear()
+    _maxima.clear()
+    _timers.clear()
+
+def count(name, n=1):
+    """Adds n to a counter"""
+    _counters[name] = _counters.get(name, 0) + int(n)
+
+def maximum(name, value):
+    """Keeps the largest value reported under name"""
+    if value > _maxima.get(name, value - 1):
+        _maxima[name] = value
+
+def add_time(name, seconds):
+    """Adds one call taking seconds to a timer"""
+    entry = _timers.setdefault(name, [0, 0.0])
+    entry[0] += 1
+    entry[1] += seconds
+
+class timer:
+    """Context manager timing its block under name, when recording is enabled
+
+        with profiling.timer('search.bfs.path_reconstruction'):
+            ...
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+def snapshot():
+    """Returns everything recorded so far as a JSON serializable dict
+
+        Besides the raw counters, maxima and timers, 'throughput' holds cells per second
+        for every '<name>.cells' counter that has a '<name>' timer next to it.
+    """
+    timers = {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in _timers.items()}
+    throughput = {}
+    for name, cells in _counters.items():
+        if name.endswith('.cells') and name[:-len('.cells')] in _timers:
+            seconds = _timers[name[:-len('.cells')]][1]
+            throughput[name + '_per_second'] = cells / seconds if seconds > 0 else None
+    return {'counters': dict(sorted(_counters.items())), 'maxima': dict(sorted(_maxima.items())),
+            'timers': dict(sorted(timers.items())), 'throughput': throughput}
+
+def dump(filename):
+    """Writes snapshot() to a JSON file"""
+    with open(filename, 'w') as f:
+        json.dump(snapshot(), f, indent=2)
+    return True
@@ -0,0 +1,170 @@
+# regression.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the regression check of generated mazes against the ground
+truth ones: every map x granularity pair is loaded as uint8 cell codes and
+reduced to a confusion matrix over free, wall, start and goal cells, pairs are
+compared in parallel, and the result is one JSON report. The exit code is 1
+when any generated maze is missing or differs from its ground truth.
+
+    python regression.py --maps Test1 Test2 --granularities 2 5
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from const import *
+from maze import MazeError, readCells
+from util import noAlienidxToConfig
+
+# row and column names of the confusion matrix, indexed by cell code (SPACE_CODE, WALL_CODE, START_CODE, OBJECTIVE_CODE)
+CELL_LABELS = ('free', 'wall', 'start', 'goal')
+
+# statuses of a pair, those in FAILURES make the check fail
+MATCH = 'match'
+MISMATCH = 'mismatch'
+NO_GT = 'no_gt'
+MISSING = 'missing'
+SHAPE_MISMATCH = 'shape_mismatch'
+ERROR = 'error'
+FAILURES = (MISMATCH, MISSING, SHAPE_MISMATCH, ERROR)
+
+def maze_files(directory, map_name, granularity):
+    """Returns the (generated, ground truth) maze files of a pair, as transform.py writes them"""
+    name = '{}_granularity_{}.txt'.format(map_name, granularity)
+    return os.path.join(directory, name), os.path.join(directory, 'gt_' + name)
+
+def confusion_matrix(expected, actual):
+    """Counts cells by (expected code, actual code) in one pass
+
+    Args:
+        expected, actual (np.ndarray): uint8 cell codes of the same shape
+
+    Returns:
+        np.ndarray: (4, 4) int64 array, entry [i, j] is the number of cells with code i in expected and j in actual
+    """
+    labels = len(CELL_LABELS)
+    pairs = expected.ravel().astype(np.intp) * labels + actual.ravel()
+    return np.bincount(pairs, minlength=labels * labels).reshape(labels, labels)
+
+def compare_pair(map_name, granularity, directory='./mazes', examples=5):
+    """Compares the generated maze of a map at a granularity with its ground truth
+
+    Returns:
+        dict: map, granularity, status and, when both mazes could be compared, the
+              number of cells, of mismatches, the confusion matrix (rows are ground
+              truth, columns generated, ordered as CELL_LABELS) and up to examples
+              mismatching configurations [x, y, shape, ground truth, generated]
+    """
+    generated_file, gt_file = maze_files(directory, map_name, granularity)
+    result = {'map': map_name, 'granularity': granularity}
+    if(not os.path.exists(gt_file)):
+        return dict(result, status=NO_GT)
+    if(not os.path.exists(generated_file)):
+        return dict(result, status=MISSING)
+    try:
+        expected, actual = readCells(gt_file), readCells(generated_file)
+    except (MazeError, OSError, IndexError) as e:
+        return dict(result, status=ERROR, error=str(e))
+    if(expected.shape != actual.shape):
+        return dict(result, status=SHAPE_MISMATCH, expected_shape=list(expected.shape), shape=list(actual.shape))
+
+    matrix = confusion_matrix(expected, actual)
+    mismatches = int(matrix.sum() - np.trace(matrix))
+    result.update(status=MISMATCH if mismatches else MATCH, cells=int(expected.size), mismatches=mismatches,
+                  confusion=matrix.tolist(), examples=[])
+    if(mismatches and examples):
+        # the first mismatches in row-major order, without scanning all of them
+        flat = np.flatnonzero(expected.ravel() != actual.ravel())[:examples]
+        for i, j, k in zip(*np.unravel_index(flat, expected.shape)):
+            x, y, shape = noAlienidxToConfig((int(j), int(i), int(k)), granularity, ALIEN_SHAPES)
+            result['examples'].append([x, y, shape, CELL_LABELS[expected[i, j, k]], CELL_LABELS[actual[i, j, k]]])
+    return result
+
+def _compare_task(args):
+    return compare_pair(*args)
+
+def compare_all(map_names, granularities, directory='./mazes', examples=5, workers=None):
+    """Runs compare_pair on every map x granularity pair, on workers processes (all cpus by default)
+
+    Returns:
+        list: the compare_pair results, ordered by granularity and then map
+    """
+    tasks = [(map_name, granularity, directory, examples) for granularity in granularities for map_name in map_names]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if(workers <= 1):
+        return [_compare_task(task) for task in tasks]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(_compare_task, tasks)
+
+def report(results):
+    """Returns the JSON serializable report of compare_all results"""
+    statuses = {}
+    for result in results:
+        statuses[result['status']] = statuses.get(result['status'], 0) + 1
+    return {'ok': not any(result['status'] in FAILURES for result in results), 'labels': list(CELL_LABELS),
+            'statuses': statuses, 'pairs': results}
+
+def describe(result):
+    """Returns a human readable summary of one compare_pair result"""
+    where = '{} at granularity {}'.format(result['map'], result['granularity'])
+    status = result['status']
+    if(status == MATCH):
+        return 'no differences identified in {}'.format(where)
+    if(status == NO_GT):
+        return 'no gt available for map {} at granularity {}'.format(result['map'], result['granularity'])
+    if(status == MISSING):
+        return 'no generated maze for {}'.format(where)
+    if(status == SHAPE_MISMATCH):
+        return 'dimensions of {} are {}, the ground truth has {}'.format(where, result['shape'], result['expected_shape'])
+    if(status == ERROR):
+        return 'cannot compare {}: {}'.format(where, result['error'])
+    lines = ['{} of {} cells differ in {}:'.format(result['mismatches'], result['cells'], where)]
+    for gt_code, row in enumerate(result['confusion']):
+        for code, cells in enumerate(row):
+            if(gt_code != code and cells):
+                lines.append('    ground truth {} identified as {}: {} cells'.format(CELL_LABELS[gt_code], CELL_LABELS[code], cells))
+    if(result['examples']):
+        lines.append('    e.g. {}'.format(', '.join('({}, {}, {}) {} -> {}'.format(*example) for example in result['examples'])))
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='compare generated mazes with the ground truth mazes')
+    parser.add_argument('--maps', dest='maps', nargs='+', default=['Test1','Test2','Test3','Test4','NoSolutionMap'],
+                        help='maps to compare - default the test maps')
+    parser.add_argument('--granularities', dest='granularities', type=int, nargs='+', default=[2,5,8,10],
+                        help='granularities to compare - default 2 5 8 10')
+    parser.add_argument('--directory', dest='directory', type=str, default='./mazes',
+                        help='directory of the generated and gt_ mazes - default ./mazes')
+    parser.add_argument('--examples', dest='examples', type=int, default=5,
+                        help='mismatching configurations listed per pair - default 5')
+    parser.add_argument('--workers', dest='workers', type=int, default=None,
+                        help='number of processes - default one per cpu')
+    parser.add_argument('--output', dest='output', type=str, default=None,
+                        help='write the JSON report to this file instead of standard output')
+    parser.add_argument('--summary', dest='summary', default=False, action='store_true',
+                        help='also print a human readable summary of every pair to standard error')
+    args = parser.parse_args()
+
+    results = compare_all(args.maps, args.granularities, args.directory, args.examples, args.workers)
+    if args.summary:
+        for result in results:
+            print(describe(result), file=sys.stderr)
+    summary = report(results)
+    document = json.dumps(summary, separators=(',', ':'))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(document + '\n')
+    else:
+        print(document)
+    sys.exit(0 if summary['ok'] else 1)
@@ -21,11 +21,23 @@ This file contains search functions.
 from collections import deque
 import heapq
 from heapq import heappop, heappush
+from itertools import count
+import hashlib
+import os
+import numpy as np
+import profiling
+from const import *
+from maze import MazeError
+from geometry import does_alien_touch_goal_batch
 
 def search(maze, searchMethod):
-    return {
-        "bfs": bfs,
-    }.get(searchMethod, [])(maze)
+    return SEARCH_METHODS.get(searchMethod, [])(maze)
+
+def _record(method, expanded, frontier_peak):
+    # node expansions and largest frontier of one search, see profiling
+    if profiling.enabled:
+        profiling.count('search.{}.expansions'.format(method), expanded)
+        profiling.maximum('search.{}.frontier_peak'.format(method), frontier_peak)
 
 def bfs(maze, ispart1=False):
     # Write your code here
@@ -33,47 +45,1135 @@ def bfs(maze, ispart1=False):
     This function returns optimal path in a list, which contains start and objective.
     If no path found, return None. 
 
+    States are flat cell ids expanded through the maze's precomputed neighbor table,
+    with a bytearray for the visited set and a preallocated array of parent ids. They
+    are decoded back to (x, y, shape) tuples only for the returned path.
+
     Args:
         maze: Maze instance from maze.py
         ispart1: pass this variable when you use functions such as getNeighbors and isObjective. DO NOT MODIFY THIS
     """
-    path = []
     start = maze.getStart()
     
     # check if start = goal
     if maze.isObjective(start[0],start[1],start[2],ispart1):
-        path.append(start)
-        return path
+        return [start]
+    if maze.isLazy():
+        return _lazy_bfs(maze, ispart1)
 
-    # visited states
-    visited = set()
-    visited.add(start)
+    offsets, indices = maze.getNeighborTable()
+    offsets = memoryview(offsets)
+    indices = memoryview(indices)
+    is_objective = (maze.get_cells() == OBJECTIVE_CODE).ravel().tobytes()
+    num_cells = len(is_objective)
+    start_id = maze.cellToId(start[0],start[1],start[2],ispart1)
+
+    # visited states and map to previous state
+    visited = bytearray(num_cells)
+    visited[start_id] = 1
+    prev = memoryview(np.empty(num_cells, dtype=np.int64))
 
     # queue 
-    frontier = deque([start])
-    
-    # map to previous state
-    prev = {}
+    frontier = deque([start_id])
+    expanded = 0
+    track = profiling.enabled
+    peak = 1
 
     # traversal
     while frontier:
-        ### val = input("continue? ")
+        if track and len(frontier) > peak:
+            peak = len(frontier)
         s = frontier.popleft()
-        ### print(s)
-        neighbors = maze.getNeighbors(s[0],s[1],s[2],ispart1)
+        expanded += 1
+        for pos in indices[offsets[s]:offsets[s + 1]]:
+            # Check if neighbor is waypoint, if not add to queue
+            if is_objective[pos]:
+                prev[pos] = s
+                maze.states_explored += expanded
+                _record('bfs', expanded, peak)
+                with profiling.timer('search.bfs.path_reconstruction'):
+                    path = [pos]
+                    while path[-1] != start_id:
+                        path.append(prev[path[-1]])
+                    path.reverse()
+                    return [start] + [maze.idToCell(cell_id, ispart1) for cell_id in path[1:]]
+            if not visited[pos]:
+                visited[pos] = 1
+                prev[pos] = s
+                frontier.append(pos)
+    maze.states_explored += expanded
+    _record('bfs', expanded, peak)
+    return None
 
-        for pos in neighbors:                  # Check if neighbor is waypoint, if not add to queue
-            if maze.isObjective(pos[0],pos[1],pos[2],ispart1):
+def _lazy_bfs(maze, ispart1=False):
+    # bfs over the cells of a lazy maze, which are only evaluated as the search reaches them
+    start = maze.getStart()
+    start_id = maze.cellToId(start[0],start[1],start[2],ispart1)
+    prev = {start_id: None}
+    frontier = deque([start_id])
+    expanded = 0
+    track = profiling.enabled
+    peak = 1
+    while frontier:
+        if track and len(frontier) > peak:
+            peak = len(frontier)
+        s = frontier.popleft()
+        expanded += 1
+        # getNeighborIds counts the expansion in states_explored
+        for pos in maze.getNeighborIds(s):
+            if maze.getCode(pos) == OBJECTIVE_CODE:
+                prev[pos] = s
+                _record('bfs', expanded, peak)
+                with profiling.timer('search.bfs.path_reconstruction'):
+                    path = [pos]
+                    while path[-1] != start_id:
+                        path.append(prev[path[-1]])
+                    path.reverse()
+                    return [start] + [maze.idToCell(cell_id, ispart1) for cell_id in path[1:]]
+            if pos not in prev:
                 prev[pos] = s
-                path = [pos]
+                frontier.append(pos)
+    _record('bfs', expanded, peak)
+    return None
+
+def bidirectional_bfs(maze, ispart1=False):
+    """
+    Breadth first search grown from both ends at once: one frontier from the start and
+    one from every objective cell. The smaller frontier is expanded by a whole layer at
+    a time, and the shortest connection found in the layer where they first meet gives
+    an optimal path. If no path found, return None.
+
+    Args:
+        maze: Maze instance from maze.py
+        ispart1: pass this variable when you use functions such as getNeighbors and isObjective. DO NOT MODIFY THIS
+    """
+    start = maze.getStart()
+    if maze.isObjective(start[0],start[1],start[2],ispart1):
+        return [start]
+
+    offsets, indices = maze.getNeighborTable()
+    offsets = memoryview(offsets)
+    indices = memoryview(indices)
+    cells = maze.get_cells().ravel()
+    start_id = maze.cellToId(start[0],start[1],start[2],ispart1)
+    goal_ids = np.flatnonzero(cells == OBJECTIVE_CODE).tolist()
+
+    # per side: depth of every visited cell (-1 if unvisited), parent ids and current layer
+    depth = [np.full(cells.size, -1, dtype=np.int64) for side in range(2)]
+    depth[0][start_id] = 0
+    depth[1][goal_ids] = 0
+    depth = [memoryview(d) for d in depth]
+    prev = [memoryview(np.empty(cells.size, dtype=np.int64)) for side in range(2)]
+    frontiers = [[start_id], goal_ids]
+    expanded = 0
+
+    peak = len(frontiers[0]) + len(frontiers[1])
+    while frontiers[0] and frontiers[1]:
+        peak = max(peak, len(frontiers[0]) + len(frontiers[1]))
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        seen, other, parent = depth[side], depth[1 - side], prev[side]
+        best = None
+        layer = []
+        for s in frontiers[side]:
+            expanded += 1
+            for pos in indices[offsets[s]:offsets[s + 1]]:
+                if seen[pos] < 0:
+                    seen[pos] = seen[s] + 1
+                    parent[pos] = s
+                    layer.append(pos)
+                    if other[pos] >= 0 and (best is None or seen[pos] + other[pos] < best[0]):
+                        best = (seen[pos] + other[pos], pos)
+        frontiers[side] = layer
+        if best is not None:
+            maze.states_explored += expanded
+            _record('bidirectional_bfs', expanded, peak)
+            with profiling.timer('search.bidirectional_bfs.path_reconstruction'):
+                # start ... meeting cell, then meeting cell ... objective
+                path = [best[1]]
+                while path[-1] != start_id:
+                    path.append(prev[0][path[-1]])
+                path.reverse()
+                while depth[1][path[-1]] != 0:
+                    path.append(prev[1][path[-1]])
+                return [start] + [maze.idToCell(cell_id, ispart1) for cell_id in path[1:]]
+    maze.states_explored += expanded
+    _record('bidirectional_bfs', expanded, peak)
+    return None
+
+def objective_distance(maze, ispart1=False):
+    """
+    Builds the A* heuristic for a maze: the number of moves to the nearest objective
+    if there were no walls. Every move changes x or y by one granularity step, or the
+    shape by one, so this never overestimates and is consistent.
+
+    Args:
+        maze: Maze instance from maze.py
+        ispart1: True if the maze states are part 1 (row, col, level) indices
+
+    Returns:
+        function mapping a state to its heuristic value
+    """
+    if ispart1:
+        objectives = np.array(maze.getObjectives(), dtype=float).reshape(-1, 3)
+        def steps(state):
+            return state
+    else:
+        shapes = maze.alien.get_shapes()
+        granularity = maze.granularity
+        objectives = np.array([(x / granularity, y / granularity, shapes.index(shape))
+                               for x, y, shape in maze.getObjectives()], dtype=float).reshape(-1, 3)
+        def steps(state):
+            return (state[0] / granularity, state[1] / granularity, shapes.index(state[2]))
+
+    def heuristic(state):
+        return np.abs(objectives - steps(state)).sum(axis=1).min()
+    return heuristic
+
+def astar(maze, ispart1=False, weight=1):
+    """
+    This function returns optimal path in a list, which contains start and objective.
+    If no path found, return None. 
+
+    Args:
+        maze: Maze instance from maze.py
+        ispart1: pass this variable when you use functions such as getNeighbors and isObjective. DO NOT MODIFY THIS
+        weight: heuristic weight, the path is only guaranteed to be optimal for weight 1
+    """
+    start = maze.getStart()
+    method = 'astar' if weight == 1 else 'weighted_astar'
+    if not maze.getObjectives():
+        # no objective to aim the heuristic at, e.g. after updateMaze removed every goal
+        _record(method, 0, 1)
+        return None
+    heuristic = objective_distance(maze, ispart1)
+
+    # cheapest known cost to each state and the state it was reached from
+    cost = {start: 0}
+    prev = {}
+    done = set()
+
+    # entries are (f, -g, insertion order, state): ties prefer deeper states, then FIFO
+    order = count()
+    frontier = [(weight * heuristic(start), 0, next(order), start)]
+    track = profiling.enabled
+    peak = 1
+
+    while frontier:
+        if track and len(frontier) > peak:
+            peak = len(frontier)
+        _, _, _, s = heappop(frontier)
+        if s in done:
+            continue
+        if maze.isObjective(s[0],s[1],s[2],ispart1):
+            # getNeighbors counted the expansions in states_explored
+            _record(method, len(done), peak)
+            with profiling.timer('search.{}.path_reconstruction'.format(method)):
+                path = [s]
                 while path[-1] != start:
                     path.append(prev[path[-1]])
                 path.reverse()
-                #print(path)
                 return path
-                #print("figure out how to map path here")
-            if pos not in visited and pos not in frontier:
+        done.add(s)
+
+        for pos in maze.getNeighbors(s[0],s[1],s[2],ispart1):
+            g = cost[s] + 1
+            if pos not in done and g < cost.get(pos, float('inf')):
+                cost[pos] = g
                 prev[pos] = s
-                frontier.append(pos)
-                visited.add(pos)
-    return None
\ No newline at end of file
+                heappush(frontier, (g + weight * heuristic(pos), -g, next(order), pos))
+    _record(method, len(done), peak)
+    return None
+
+def weighted_astar(maze, ispart1=False, weight=DEFAULT_HEURISTIC_WEIGHT):
+    """
+    Weighted A*: A* with the heuristic scaled by weight, trading path optimality
+    (the path is at most weight times longer than optimal) for fewer explored states.
+    If no path found, return None.
+
+    Args:
+        maze: Maze instance from maze.py
+        ispart1: pass this variable when you use functions such as getNeighbors and isObjective. DO NOT MODIFY THIS
+        weight: heuristic weight
+    """
+    return astar(maze, ispart1, weight)
+
+class DStarLite:
+    """
+    Incremental planner (D* Lite) that repairs its previous solution after cells of the
+    maze change, instead of searching again from nothing.
+
+    It searches backwards from every objective towards the start, keeping the g and rhs
+    values of the cells between calls to plan. The planner listens to the maze for cell
+    changes (Maze.applyCells, e.g. through transform.updateMaze); the next plan only
+    re-expands the cells whose distance to the objectives those changes affect. The
+    start may also move between calls.
+    """
+
+    def __init__(self, maze, ispart1=False):
+        """
+        Args:
+            maze: Maze instance from maze.py
+            ispart1: True if the maze states are part 1 (row, col, level) indices
+        """
+        self.maze = maze
+        self.ispart1 = ispart1
+        # states expanded by the last call to plan
+        self.states_explored = 0
+        self.__dims = maze.getDimensions()
+        self.__cells = memoryview(maze.get_cells().reshape(-1))
+        num_cells = len(self.__cells)
+        self.__g = [float('inf')] * num_cells
+        self.__rhs = [float('inf')] * num_cells
+        # heap entries are (key, cell id), the current key of each queued cell is in __queued
+        self.__queue = []
+        self.__queued = {}
+        self.__km = 0
+        self.__last = None
+        self.__changed = []
+        for cell_id in np.flatnonzero(maze.get_cells().reshape(-1) == OBJECTIVE_CODE).tolist():
+            self.__rhs[cell_id] = 0
+        maze.addCellListener(self.cellsChanged)
+
+    def close(self):
+        """Stop listening to the maze"""
+        self.maze.removeCellListener(self.cellsChanged)
+
+    def cellsChanged(self, cell_ids):
+        """Notification of the flat ids of maze cells whose code changed, handled by the next plan"""
+        self.__changed.extend(int(cell_id) for cell_id in cell_ids)
+
+    def __coords(self, cell_id):
+        xy, shape = divmod(cell_id, self.__dims[SHAPE])
+        x, y = divmod(xy, self.__dims[Y])
+        return x, y, shape
+
+    def __neighbors(self, cell_id):
+        # adjacent cell ids in the order getNeighbors lists them, walls included
+        x, y, shape = self.__coords(cell_id)
+        step_y = self.__dims[SHAPE]
+        step_x = self.__dims[Y] * step_y
+        if x + 1 < self.__dims[X]:
+            yield cell_id + step_x
+        if x > 0:
+            yield cell_id - step_x
+        if y + 1 < self.__dims[Y]:
+            yield cell_id + step_y
+        if y > 0:
+            yield cell_id - step_y
+        if shape > 0:
+            yield cell_id - 1
+        if shape + 1 < self.__dims[SHAPE]:
+            yield cell_id + 1
+
+    def __heuristic(self, cell_id):
+        # moves between the cell and the start if there were no walls
+        x, y, shape = self.__coords(cell_id)
+        return abs(x - self.__start[X]) + abs(y - self.__start[Y]) + abs(shape - self.__start[SHAPE])
+
+    def __key(self, cell_id):
+        best = min(self.__g[cell_id], self.__rhs[cell_id])
+        return (best + self.__heuristic(cell_id) + self.__km, best)
+
+    def __updateVertex(self, cell_id):
+        cells = self.__cells
+        if cells[cell_id] == WALL_CODE:
+            self.__rhs[cell_id] = float('inf')
+        elif cells[cell_id] == OBJECTIVE_CODE:
+            self.__rhs[cell_id] = 0
+        else:
+            g = self.__g
+            self.__rhs[cell_id] = min((g[n] for n in self.__neighbors(cell_id) if cells[n] != WALL_CODE),
+                                      default=float('inf')) + 1
+        if self.__g[cell_id] != self.__rhs[cell_id]:
+            key = self.__key(cell_id)
+            self.__queued[cell_id] = key
+            heappush(self.__queue, (key, cell_id))
+        else:
+            self.__queued.pop(cell_id, None)
+
+    def __topKey(self):
+        # drop heap entries whose cell was removed or queued again with another key
+        queue = self.__queue
+        while queue and self.__queued.get(queue[0][1]) != queue[0][0]:
+            heappop(queue)
+        return queue[0][0] if queue else (float('inf'), float('inf'))
+
+    def __computeShortestPath(self):
+        g, rhs, cells = self.__g, self.__rhs, self.__cells
+        start = self.__start_id
+        expanded = 0
+        peak = len(self.__queued)
+        track = profiling.enabled
+        while self.__topKey() < self.__key(start) or rhs[start] != g[start]:
+            if track and len(self.__queued) > peak:
+                peak = len(self.__queued)
+            old_key, u = heappop(self.__queue)
+            del self.__queued[u]
+            new_key = self.__key(u)
+            if old_key < new_key:
+                self.__queued[u] = new_key
+                heappush(self.__queue, (new_key, u))
+                continue
+            expanded += 1
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+            else:
+                g[u] = float('inf')
+                self.__updateVertex(u)
+            for n in self.__neighbors(u):
+                if cells[n] != WALL_CODE:
+                    self.__updateVertex(n)
+        _record('dstar_lite', expanded, peak)
+        return expanded
+
+    def plan(self):
+        """
+        Returns the optimal path from the maze start to the nearest objective, in the same
+        format bfs returns, after handling the cell changes notified since the last call.
+        If no path found, return None.
+        """
+        start = self.maze.getStart()
+        self.__start_id = self.maze.cellToId(start[0], start[1], start[2], self.ispart1)
+        if self.__last is None:
+            self.__start = self.__coords(self.__start_id)
+            for cell_id, rhs in enumerate(self.__rhs):
+                if rhs == 0:
+                    self.__queued[cell_id] = self.__key(cell_id)
+                    heappush(self.__queue, (self.__queued[cell_id], cell_id))
+        elif self.__last != self.__start_id:
+            # the start moved, every queued key is now too high by at most this much
+            self.__km += self.__heuristic(self.__start_id)
+            self.__start = self.__coords(self.__start_id)
+        self.__last = self.__start_id
+
+        changed = set(self.__changed)
+        self.__changed = []
+        for cell_id in changed:
+            self.__updateVertex(cell_id)
+            for n in self.__neighbors(cell_id):
+                if n not in changed:
+                    self.__updateVertex(n)
+
+        self.states_explored = self.__computeShortestPath()
+        self.maze.states_explored += self.states_explored
+
+        g, cells = self.__g, self.__cells
+        cell_id = self.__start_id
+        if g[cell_id] == float('inf') or cells[cell_id] == WALL_CODE:
+            return None
+        with profiling.timer('search.dstar_lite.path_reconstruction'):
+            path = [start]
+            while cells[cell_id] != OBJECTIVE_CODE:
+                cell_id = min((n for n in self.__neighbors(cell_id) if cells[n] != WALL_CODE), key=g.__getitem__)
+                path.append(self.maze.idToCell(cell_id, self.ispart1))
+            return path
+
+def dstar_lite(maze, ispart1=False):
+    """
+    One-shot D* Lite search, see DStarLite for replanning after maze edits.
+    If no path found, return None.
+
+    Args:
+        maze: Maze instance from maze.py
+        ispart1: pass this variable when you use functions such as getNeighbors and isObjective. DO NOT MODIFY THIS
+    """
+    planner = DStarLite(maze, ispart1)
+    try:
+        return planner.plan()
+    finally:
+        planner.close()
+
+def jps(maze, ispart1=False):
+    """
+    Jump Point Search for the uniform cost grid of a maze: four planar moves plus
+    level (shape) changes. Instead of pushing every neighbor, a node jumps straight
+    along each axis and only stops at objectives and jump points, where a forced
+    neighbor appears or, when moving along a higher axis, where a jump along a lower
+    axis finds one, which is remembered for later scans. Only jump points are pushed
+    and expanded, with A* on the Manhattan distance to the nearest objective, and the
+    straight segments between them are filled in for the returned path.
+    If no path found, return None.
+
+    Args:
+        maze: Maze instance from maze.py
+        ispart1: pass this variable when you use functions such as getNeighbors and isObjective. DO NOT MODIFY THIS
+    """
+    start = maze.getStart()
+    if maze.isObjective(start[0],start[1],start[2],ispart1):
+        return [start]
+    if maze.isLazy():
+        # scanning ahead would evaluate most of a lazy maze anyway
+        return astar(maze, ispart1)
+
+    # padding the grid with walls on every side removes all bounds checks
+    cells = np.pad(maze.get_cells(), 1, constant_values=WALL_CODE)
+    n, m, h = cells.shape
+    free = (cells != WALL_CODE).ravel().tobytes()
+    is_objective = (cells == OBJECTIVE_CODE).ravel().tobytes()
+    # strides of the axes, lowest first: rows, levels, columns. This order expands the
+    # fewest jump points on the test mazes, levels as the lowest axis the most
+    strides = (m * h, 1, h)
+    objectives = np.argwhere(cells == OBJECTIVE_CODE)
+    if objectives.size == 0:
+        # nothing to jump towards, as bfs finds no path either
+        _record('jps', 0, 1)
+        return None
+
+    def coords(p):
+        i, rest = divmod(p, m * h)
+        j, k = divmod(rest, h)
+        return i, j, k
+
+    def heuristic(p):
+        return int(np.abs(objectives - coords(p)).sum(axis=1).min())
+
+    def jump(p, axis, step):
+        # next jump point from p along axis in direction step, or None at a wall
+        delta = step * strides[axis]
+        others = [strides[b] for b in range(3) if b != axis]
+        p += delta
+        while free[p]:
+            if is_objective[p]:
+                return p
+            behind = p - delta
+            for d in others:
+                if (free[p + d] and not free[behind + d]) or (free[p - d] and not free[behind - d]):
+                    return p
+            for lower in range(axis):
+                if lower_jump(p, lower, 1) is not None or lower_jump(p, lower, -1) is not None:
+                    return p
+            p += delta
+        return None
+
+    # jumps along lower axes are repeated by every scan crossing the same cells
+    memo = {}
+    def lower_jump(p, axis, step):
+        key = (p, axis, step)
+        if key not in memo:
+            memo[key] = jump(p, axis, step)
+        return memo[key]
+
+    # unpadded flat ids, as cellToId and idToCell use them, differ from padded ones
+    dims = maze.getDimensions()
+    i, rest = divmod(maze.cellToId(start[0],start[1],start[2],ispart1), dims[1] * dims[2])
+    j, k = divmod(rest, dims[2])
+    start_p = ((i + 1) * m + j + 1) * h + k + 1
+
+    # cheapest known cost, parent jump point and arrival (axis, step) of every pushed node
+    cost = {start_p: 0}
+    prev = {}
+    arrival = {start_p: None}
+    done = set()
+    order = count()
+    frontier = [(heuristic(start_p), 0, next(order), start_p)]
+    track = profiling.enabled
+    peak = 1
+
+    while frontier:
+        if track and len(frontier) > peak:
+            peak = len(frontier)
+        _, _, _, p = heappop(frontier)
+        if p in done:
+            continue
+        if is_objective[p]:
+            maze.states_explored += len(done)
+            _record('jps', len(done), peak)
+            with profiling.timer('search.jps.path_reconstruction'):
+                jump_points = [p]
+                while jump_points[-1] != start_p:
+                    jump_points.append(prev[jump_points[-1]])
+                jump_points.reverse()
+                path = [start_p]
+                for q in jump_points[1:]:
+                    axis, step = arrival[q]
+                    delta = step * strides[axis]
+                    path.extend(range(path[-1] + delta, q + delta, delta))
+                result = [start]
+                for q in path[1:]:
+                    i, j, k = coords(q)
+                    result.append(maze.idToCell(((i - 1) * dims[1] + j - 1) * dims[2] + k - 1, ispart1))
+                return result
+        done.add(p)
+
+        came = arrival[p]
+        for axis in range(3):
+            for step in (1, -1):
+                if came is not None and came == (axis, -step):
+                    continue
+                q = jump(p, axis, step)
+                if q is None or q in done:
+                    continue
+                g = cost[p] + abs(q - p) // strides[axis]
+                if g < cost.get(q, float('inf')):
+                    cost[q] = g
+                    prev[q] = p
+                    arrival[q] = (axis, step)
+                    heappush(frontier, (g + heuristic(q), -g, next(order), q))
+    maze.states_explored += len(done)
+    _record('jps', len(done), peak)
+    return None
+
+def _expand_layer(offsets, indices, frontier):
+    # all (neighbor, parent) pairs of a layer of cell ids, read from the CSR neighbor table
+    starts = offsets[frontier]
+    counts = offsets[frontier + 1] - starts
+    first = np.cumsum(counts) - counts
+    positions = np.repeat(starts - first, counts) + np.arange(counts.sum())
+    return indices[positions], np.repeat(frontier, counts)
+
+class DistanceField:
+    """
+    Distance from every cell of a maze to its nearest objective, with the next cell to
+    move to on a shortest path. It is computed by one multi-source breadth first search
+    backwards from all objective cells, or from a given set of source cells, after which
+    the optimal path from any free start cell is read out in O(path length) without
+    searching again.
+    """
+
+    def __init__(self, maze, ispart1=False, distance=None, next_hop=None, sources=None):
+        """
+        Args:
+            maze: Maze instance from maze.py
+            ispart1: True if the maze states are part 1 (row, col, level) indices
+            distance, next_hop: precomputed arrays (see load), computed from the maze when omitted
+            sources: flat ids of the cells to measure distances to instead of all objective cells
+        """
+        self.maze = maze
+        self.ispart1 = ispart1
+        self.sources = sources
+        if distance is None:
+            distance, next_hop = self.__compute()
+        self.distance = distance
+        self.next_hop = next_hop
+
+    def __compute(self):
+        offsets, indices = self.maze.getNeighborTable()
+        cells = self.maze.get_cells().ravel()
+        # -1 marks cells that cannot reach an objective, next_hop of an objective is -1
+        distance = np.full(cells.size, -1, dtype=np.int32)
+        next_hop = np.full(cells.size, -1, dtype=np.int32)
+        if self.sources is None:
+            frontier = np.flatnonzero(cells == OBJECTIVE_CODE)
+        else:
+            frontier = np.unique(np.asarray(self.sources, dtype=np.int64))
+        distance[frontier] = 0
+        level = 0
+        expanded = peak = 0
+        while frontier.size:
+            expanded += frontier.size
+            peak = max(peak, frontier.size)
+            self.maze.states_explored += frontier.size
+            level += 1
+            neighbors, parents = _expand_layer(offsets, indices, frontier)
+            new = distance[neighbors] < 0
+            # the first parent listed for a cell becomes its next hop
+            frontier, first = np.unique(neighbors[new], return_index=True)
+            distance[frontier] = level
+            next_hop[frontier] = parents[new][first]
+        _record('distance_field', expanded, peak)
+        return distance, next_hop
+
+    def getDistance(self, start):
+        """Number of moves from start to the nearest objective, or None if none is reachable"""
+        d = int(self.distance[self.maze.cellToId(start[0], start[1], start[2], self.ispart1)])
+        return d if d >= 0 else None
+
+    def getPath(self, start=None):
+        """
+        Optimal path, in the same format bfs returns, from start (the maze start by
+        default) to the nearest objective. If no path found, return None.
+        """
+        if start is None:
+            start = self.maze.getStart()
+        cell_id = self.maze.cellToId(start[0], start[1], start[2], self.ispart1)
+        if self.distance[cell_id] < 0:
+            return None
+        path = [tuple(start)]
+        for _ in range(self.distance[cell_id]):
+            cell_id = self.next_hop[cell_id]
+            path.append(self.maze.idToCell(cell_id, self.ispart1))
+        return path
+
+    def save(self, filename):
+        """Save the arrays to a .npz file (see distance_field_file), with a checksum of the maze cells"""
+        np.savez_compressed(filename, distance=self.distance, next_hop=self.next_hop,
+                            dimensions=np.array(self.maze.getDimensions()),
+                            checksum=np.frombuffer(hashlib.sha1(self.maze.get_cells().tobytes()).digest(), dtype=np.uint8))
+        return True
+
+    @classmethod
+    def load(cls, filename, maze, ispart1=False):
+        """Load arrays saved by save, checking that they were computed for the same maze cells"""
+        with np.load(filename) as data:
+            checksum = np.frombuffer(hashlib.sha1(maze.get_cells().tobytes()).digest(), dtype=np.uint8)
+            if list(data['dimensions']) != list(maze.getDimensions()) or not np.array_equal(data['checksum'], checksum):
+                raise MazeError('distance field {0} was computed for a different maze'.format(filename))
+            return cls(maze, ispart1, data['distance'], data['next_hop'])
+
+class ObjectiveGraph:
+    """
+    Shortest distances between the start and every objective cluster of a maze, for
+    tours that have to visit all of them. In a maze transformed from a map, a cluster is
+    the set of objective cells touching one goal circle of the map; otherwise it is a
+    connected group of objective cells, such as a part 1 waypoint. Each cluster gets one multi-source
+    DistanceField, so K clusters cost K grid searches whatever the number of pairs, and
+    the K x K distance matrix read from them is kept for every later tour.
+
+    The distance between two clusters is that of their closest cells. A tour enters a
+    cluster at the cell nearest to where it came from, so with multi-cell clusters the
+    path can be a little longer than the matrix predicts.
+    """
+
+    def __init__(self, maze, ispart1=False, distances=None, next_hops=None):
+        """
+        Args:
+            maze: Maze instance from maze.py
+            ispart1: True if the maze states are part 1 (row, col, level) indices
+            distances, next_hops: precomputed (K, cells) arrays (see load), computed from the maze when omitted
+        """
+        self.maze = maze
+        self.ispart1 = ispart1
+        self.labels, self.clusters = self.__cluster()
+        if distances is None:
+            self.fields = [DistanceField(maze, ispart1, sources=cluster) for cluster in self.clusters]
+        else:
+            self.fields = [DistanceField(maze, ispart1, d, h, sources=cluster)
+                           for d, h, cluster in zip(distances, next_hops, self.clusters)]
+        # matrix[a, b]: moves from the closest cell of cluster a to cluster b, inf if unreachable
+        self.matrix = np.full((len(self.clusters), len(self.clusters)), np.inf)
+        for b, field in enumerate(self.fields):
+            for a, cluster in enumerate(self.clusters):
+                d = field.distance[cluster]
+                d = d[d >= 0]
+                if d.size:
+                    self.matrix[a, b] = d.min()
+        self.__msts = {}
+
+    def __cluster(self):
+        # objective cell id -> clusters it belongs to, and the sorted cell ids of each cluster
+        cells = self.maze.get_cells()
+        objective_ids = np.flatnonzero(cells.ravel() == OBJECTIVE_CODE)
+        alien = self.maze.alien
+        if not self.ispart1 and alien is not None and getattr(self.maze, 'goals', None):
+            # one cluster per goal circle: the objective cells whose alien touches it
+            idx = np.argwhere(cells == OBJECTIVE_CODE).astype(float)
+            configs = np.column_stack((idx[:, X] * self.maze.granularity + self.maze.offsets[X],
+                                       idx[:, Y] * self.maze.granularity + self.maze.offsets[Y], idx[:, SHAPE]))
+            clusters = [objective_ids[does_alien_touch_goal_batch(configs, [goal], alien.get_lengths(),
+                                                                  alien.get_widths(), alien.get_shapes())]
+                        for goal in self.maze.goals]
+        else:
+            # one cluster per connected group of objective cells, through the neighbor table
+            offsets, indices = self.maze.getNeighborTable()
+            is_objective = cells.ravel() == OBJECTIVE_CODE
+            seen = set()
+            clusters = []
+            for cell_id in objective_ids.tolist():
+                if cell_id in seen:
+                    continue
+                seen.add(cell_id)
+                members = [cell_id]
+                for s in members:
+                    for pos in indices[offsets[s]:offsets[s + 1]].tolist():
+                        if is_objective[pos] and pos not in seen:
+                            seen.add(pos)
+                            members.append(pos)
+                clusters.append(np.array(sorted(members), dtype=np.int64))
+        labels = {}
+        for cluster_idx, cluster in enumerate(clusters):
+            for cell_id in cluster.tolist():
+                labels.setdefault(cell_id, []).append(cluster_idx)
+        return labels, clusters
+
+    def getStartDistances(self, start=None):
+        """Moves from start (the maze start by default) to each cluster, inf if unreachable"""
+        if start is None:
+            start = self.maze.getStart()
+        cell_id = self.maze.cellToId(start[0], start[1], start[2], self.ispart1)
+        return np.array([field.distance[cell_id] if field.distance[cell_id] >= 0 else np.inf for field in self.fields])
+
+    def __mst(self, matrix, unvisited):
+        # weight of the minimum spanning tree of a set of clusters (Prim), kept per set
+        key = (id(matrix), unvisited)
+        if key not in self.__msts:
+            nodes = [i for i in range(len(matrix)) if unvisited >> i & 1]
+            weights = matrix[np.ix_(nodes, nodes)]
+            in_tree = np.zeros(len(nodes), dtype=bool)
+            in_tree[0] = True
+            best = weights[0].copy()
+            total = 0.0
+            for _ in range(len(nodes) - 1):
+                best[in_tree] = np.inf
+                j = int(best.argmin())
+                total += best[j]
+                in_tree[j] = True
+                best = np.minimum(best, weights[j])
+            self.__msts[key] = total
+        return self.__msts[key]
+
+    def __orderDP(self, first, matrix):
+        # Held-Karp over (visited set, last cluster)
+        k = len(matrix)
+        cost = np.full((1 << k, k), np.inf)
+        parent = np.full((1 << k, k), -1, dtype=np.int64)
+        for j in range(k):
+            cost[1 << j, j] = first[j]
+        for mask in range(1, 1 << k):
+            # cheapest way to append each cluster after any last cluster of this set
+            through = cost[mask][:, None] + matrix
+            best = through.argmin(axis=0)
+            for j in range(k):
+                if not mask >> j & 1 and through[best[j], j] < cost[mask | 1 << j, j]:
+                    cost[mask | 1 << j, j] = through[best[j], j]
+                    parent[mask | 1 << j, j] = best[j]
+        mask = (1 << k) - 1
+        last = int(cost[mask].argmin())
+        total = cost[mask, last]
+        order = []
+        while last >= 0:
+            order.append(last)
+            mask, last = mask ^ (1 << last), int(parent[mask, last])
+        order.reverse()
+        return order, total
+
+    def __orderAStar(self, first, matrix, weight):
+        # A* over (visited set, last cluster), h = MST of the unvisited clusters plus the
+        # cheapest edge into them, which never overestimates the rest of the tour
+        k = len(matrix)
+        full = (1 << k) - 1
+        def heuristic(visited, last):
+            unvisited = full ^ visited
+            if not unvisited:
+                return 0
+            nodes = [i for i in range(k) if unvisited >> i & 1]
+            edges = first[nodes] if last < 0 else matrix[last, nodes]
+            return edges.min() + self.__mst(matrix, unvisited)
+        order_count = count()
+        frontier = [(weight * heuristic(0, -1), 0, next(order_count), 0, -1)]
+        cost = {(0, -1): 0}
+        prev = {}
+        done = set()
+        track = profiling.enabled
+        peak = 1
+        while frontier:
+            if track and len(frontier) > peak:
+                peak = len(frontier)
+            _, g, _, visited, last = heappop(frontier)
+            state = (visited, last)
+            if state in done:
+                continue
+            if visited == full:
+                _record('tour.order', len(done), peak)
+                order = []
+                while state != (0, -1):
+                    order.append(state[1])
+                    state = prev[state]
+                order.reverse()
+                return order, g
+            done.add(state)
+            for j in range(k):
+                if visited >> j & 1:
+                    continue
+                g_next = g + (first[j] if last < 0 else matrix[last, j])
+                state_next = (visited | 1 << j, j)
+                if state_next not in done and g_next < cost.get(state_next, np.inf):
+                    cost[state_next] = g_next
+                    prev[state_next] = state
+                    heappush(frontier, (g_next + weight * heuristic(visited | 1 << j, j), g_next, next(order_count)) + state_next)
+
+    def getOrder(self, start=None, weight=1, dp_max_objectives=TOUR_DP_MAX_OBJECTIVES):
+        """
+        Order of the clusters on the shortest tour from start (the maze start by default)
+        through all of them, by dynamic programming up to dp_max_objectives clusters and by
+        A* bounded by minimum spanning trees above that. A weight above 1 makes the A* faster at
+        the price of a tour up to weight times longer. Clusters that cannot be reached from
+        start, including goals no free configuration touches, are left out of the tour.
+
+        Returns:
+            (list, float): cluster indices in visiting order and the tour length by the matrix,
+                           (None, inf) if no cluster can be reached
+        """
+        first = self.getStartDistances(start)
+        reachable = np.flatnonzero(np.isfinite(first))
+        if not reachable.size:
+            return None, np.inf
+        # clusters reachable from the start are all reachable from each other
+        first, matrix = first[reachable], self.matrix[np.ix_(reachable, reachable)]
+        if len(reachable) <= dp_max_objectives:
+            order, total = self.__orderDP(first, matrix)
+        else:
+            order, total = self.__orderAStar(first, matrix, weight)
+            self.__msts.clear()
+        return [int(reachable[i]) for i in order], float(total)
+
+    def getPath(self, start=None, order=None, weight=1):
+        """
+        Path, in the same format bfs returns, from start (the maze start by default) through
+        every cluster in order (see getOrder by default). Clusters crossed on the way to
+        another one count as visited. If no path found, return None.
+        """
+        if start is None:
+            start = self.maze.getStart()
+        if order is None:
+            order = self.getOrder(start, weight)[0]
+        if order is None:
+            return None
+        cell_id = self.maze.cellToId(start[0], start[1], start[2], self.ispart1)
+        ids = []
+        visited = set()
+        for cluster in order:
+            if cluster in visited:
+                continue
+            field = self.fields[cluster]
+            for _ in range(field.distance[cell_id]):
+                cell_id = int(field.next_hop[cell_id])
+                ids.append(cell_id)
+                visited.update(self.labels.get(cell_id, ()))
+        return [tuple(start)] + [self.maze.idToCell(cell_id, self.ispart1) for cell_id in ids]
+
+    def save(self, filename):
+        """Save the per cluster arrays to a .npz file, with a checksum of the maze cells"""
+        np.savez_compressed(filename, distances=np.array([field.distance for field in self.fields]).reshape(len(self.fields), -1),
+                            next_hops=np.array([field.next_hop for field in self.fields]).reshape(len(self.fields), -1),
+                            dimensions=np.array(self.maze.getDimensions()),
+                            checksum=np.frombuffer(hashlib.sha1(self.maze.get_cells().tobytes()).digest(), dtype=np.uint8))
+        return True
+
+    @classmethod
+    def load(cls, filename, maze, ispart1=False):
+        """Load arrays saved by save, checking that they were computed for the same maze cells"""
+        with np.load(filename) as data:
+            checksum = np.frombuffer(hashlib.sha1(maze.get_cells().tobytes()).digest(), dtype=np.uint8)
+            if list(data['dimensions']) != list(maze.getDimensions()) or not np.array_equal(data['checksum'], checksum):
+                raise MazeError('objective graph {0} was computed for a different maze'.format(filename))
+            return cls(maze, ispart1, data['distances'], data['next_hops'])
+
+def tour(maze, ispart1=False):
+    """
+    Shortest tour from the start through every objective cluster it can reach, see
+    ObjectiveGraph. If no objective can be reached, return None.
+
+    Args:
+        maze: Maze instance from maze.py
+        ispart1: pass this variable when you use functions such as getNeighbors and isObjective. DO NOT MODIFY THIS
+    """
+    return ObjectiveGraph(maze, ispart1).getPath()
+
+SEARCH_METHODS = {
+    "bfs": bfs,
+    "bidirectional_bfs": bidirectional_bfs,
+    "astar": astar,
+    "weighted_astar": weighted_astar,
+    "dstar_lite": dstar_lite,
+    "jps": jps,
+    "tour": tour,
+}
+
+def distance_field_file(maze_file):
+    """File the distance field of the maze stored in maze_file is saved to, next to it"""
+    return os.path.splitext(maze_file)[0] + '.dist.npz'
+
+if __name__ == '__main__':
+    import glob
+    import time
+    from maze import Maze, MazeError
+
+    def tuple_bfs(maze, ispart1=False):
+        # the previous bfs, keyed on (x, y, shape) tuples with a linear frontier membership test
+        start = maze.getStart()
+        if maze.isObjective(start[0],start[1],start[2],ispart1):
+            return [start]
+        visited = set([start])
+        frontier = deque([start])
+        prev = {}
+        while frontier:
+            s = frontier.popleft()
+            for pos in maze.getNeighbors(s[0],s[1],s[2],ispart1):
+                if maze.isObjective(pos[0],pos[1],pos[2],ispart1):
+                    prev[pos] = s
+                    path = [pos]
+                    while path[-1] != start:
+                        path.append(prev[path[-1]])
+                    path.reverse()
+                    return path
+                if pos not in visited and pos not in frontier:
+                    prev[pos] = s
+                    frontier.append(pos)
+                    visited.add(pos)
+        return None
+
+    print('{:<42} {:>8} {:>8} {:>12} {:>12} {:>8}'.format('maze', 'path', 'states', 'tuple (ms)', 'int (ms)', 'speedup'))
+    for path in sorted(glob.glob('./mazes/*')):
+        try:
+            maze = Maze(None, None, filepath=path)
+        except MazeError as e:
+            print('{:<42} skipped: {}'.format(path, e))
+            continue
+        timings = []
+        results = []
+        for method in (tuple_bfs, bfs):
+            maze.states_explored = 0
+            start = time.perf_counter()
+            found = method(maze, True)
+            timings.append(time.perf_counter() - start)
+            results.append((found, maze.states_explored))
+        assert results[0] == results[1], 'bfs results differ on {}'.format(path)
+        found, states = results[1]
+        print('{:<42} {:>8} {:>8} {:>12.2f} {:>12.2f} {:>7.1f}x'.format(
+            path, len(found) if found else '-', states, timings[0]*1e3, timings[1]*1e3, timings[0]/timings[1]))
+
+    # states explored by bfs and bidirectional_bfs in the configuration space of the test maps
+    import os
+    from mapconfig import loadMap
+    from transform import transformToMaze
+
+    print('\n{:<8} {:>11} {:>6} {:>12} {:>20}'.format('map', 'granularity', 'path', 'bfs states', 'bidirectional states'))
+    for map_name in ['Test1','Test2','Test3','Test4']:
+        map_config = loadMap('./maps/test_config.txt', map_name)
+        for granularity in [2,5,8,10]:
+            maze = transformToMaze(map_config.makeAlien(),map_config.getGoals(),map_config.getWalls(),map_config.window,granularity)
+            counts = []
+            for method in (bfs, bidirectional_bfs):
+                maze.states_explored = 0
+                found = method(maze)
+                valid = found is None or maze.isValidPath(found) == 'Valid'
+                counts.append(maze.states_explored)
+                assert valid, '{} returned an invalid path'.format(method.__name__)
+            print('{:<8} {:>11} {:>6} {:>12} {:>20}'.format(map_name, granularity, len(found) if found else '-', *counts))
+
+    # one distance field per maze against a bfs per start, from random free starts
+    import random
+    import tempfile
+    random.seed(0)
+    print('\n{:<42} {:>7} {:>10} {:>14} {:>14}'.format('maze', 'starts', 'field (ms)', 'query (us)', 'bfs (ms)'))
+    for path in sorted(glob.glob('./mazes/gt_*_granularity_2.txt')):
+        maze = Maze(None, None, filepath=path)
+        start = time.perf_counter()
+        field = DistanceField(maze, True)
+        build = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as directory:
+            field_file = distance_field_file(os.path.join(directory, os.path.basename(path)))
+            field.save(field_file)
+            loaded = DistanceField.load(field_file, maze, True)
+            assert np.array_equal(loaded.next_hop, field.next_hop)
+        free = [tuple(int(i) for i in cell) for cell in np.argwhere(maze.get_cells() != WALL_CODE)]
+        starts = random.sample(free, min(200, len(free)))
+        query_time = bfs_time = 0
+        for s in starts:
+            start = time.perf_counter()
+            found = field.getPath(s)
+            query_time += time.perf_counter() - start
+            maze.setStart(s)
+            start = time.perf_counter()
+            expected = bfs(maze, True)
+            bfs_time += time.perf_counter() - start
+            assert (found is None) == (expected is None), 'reachability differs from {} on {}'.format(s, path)
+            if found:
+                assert len(found) == len(expected) and maze.isValidPath(found, True) == 'Valid', \
+                    'field path differs from bfs from {} on {}'.format(s, path)
+        print('{:<42} {:>7} {:>10.2f} {:>14.1f} {:>14.2f}'.format(
+            path, len(starts), build*1e3, query_time/len(starts)*1e6, bfs_time/len(starts)*1e3))
+
+    # D* Lite replanning after small wall edits, against a fresh search of the edited maze
+    from transform import updateMaze
+    print('\n{:<8} {:>4} {:>22} {:>6} {:>15} {:>15} {:>12}'.format(
+        'map', 'edit', 'wall', 'path', 'replan states', 'fresh d* states', 'bfs states'))
+    for map_name in ['Test3','Test4']:
+        map_config = loadMap('./maps/test_config.txt', map_name)
+        maze = transformToMaze(map_config.makeAlien(),map_config.getGoals(),map_config.getWalls(),map_config.window,2)
+        planner = DStarLite(maze)
+        found = planner.plan()
+        print('{:<8} {:>4} {:>22} {:>6} {:>15}'.format(map_name, '-', '-', len(found) if found else '-', planner.states_explored))
+        for edit in range(1, 6):
+            if not found:
+                break
+            # a short wall across the current path
+            x, y, _ = found[len(found) * edit // 6]
+            wall = (x - 1, y + 1, x + 1, y + 1) if edit % 2 else (x + 1, y - 1, x + 1, y + 1)
+            updateMaze(maze, added_walls=[wall])
+            found = planner.plan()
+            fresh = DStarLite(maze)
+            fresh_found = fresh.plan()
+            fresh.close()
+            maze.states_explored = 0
+            expected = bfs(maze)
+            assert (found is None) == (expected is None) and (not found or len(found) == len(expected) == len(fresh_found))
+            assert found is None or maze.isValidPath(found) == 'Valid'
+            print('{:<8} {:>4} {:>22} {:>6} {:>15} {:>15} {:>12}'.format(
+                map_name, edit, str(wall), len(found) if found else '-', planner.states_explored, fresh.states_explored, maze.states_explored))
+        planner.close()
+
+    # Jump Point Search against bfs and A* on every maze file
+    print('\n{:<42} {:>6} {:>11} {:>11} {:>11} {:>9} {:>10} {:>9}'.format(
+        'maze', 'path', 'bfs states', 'A* states', 'jps states', 'bfs (ms)', 'A* (ms)', 'jps (ms)'))
+    for path in sorted(glob.glob('./mazes/*')):
+        try:
+            maze = Maze(None, None, filepath=path)
+        except MazeError as e:
+            print('{:<42} skipped: {}'.format(path, e))
+            continue
+        states, timings, lengths = [], [], []
+        for method in (bfs, astar, jps):
+            maze.states_explored = 0
+            start = time.perf_counter()
+            found = method(maze, True)
+            timings.append(time.perf_counter() - start)
+            states.append(maze.states_explored)
+            lengths.append(len(found) if found else None)
+            assert found is None or maze.isValidPath(found, True) == 'Valid'
+        assert lengths[0] == lengths[1] == lengths[2], 'path lengths differ on {}'.format(path)
+        print('{:<42} {:>6} {:>11} {:>11} {:>11} {:>9.2f} {:>10.2f} {:>9.2f}'.format(
+            path, lengths[0] or '-', *states, *(t*1e3 for t in timings)))
+
+    # tours through every objective: one grid search per cluster, then the visiting order
+    import tempfile
+    print('\n{:<42} {:>8} {:>6} {:>8} {:>10} {:>10}'.format('maze', 'clusters', 'tour', 'states', 'graph (ms)', 'order (ms)'))
+    tours = [(path, Maze(None, None, filepath=path), True) for path in sorted(glob.glob('./mazes/*-3d'))]
+    for map_name in ['Test1','Test2','Test3','Test4']:
+        map_config = loadMap('./maps/test_config.txt', map_name)
+        tours.append(('{} config space, granularity 2'.format(map_name), transformToMaze(
+            map_config.makeAlien(),map_config.getGoals(),map_config.getWalls(),map_config.window,2), False))
+    for name, maze, part1 in tours:
+        maze.states_explored = 0
+        start = time.perf_counter()
+        graph = ObjectiveGraph(maze, part1)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        order, _ = graph.getOrder()
+        order_time = time.perf_counter() - start
+        found = graph.getPath(order=order)
+        assert found is None or maze.isValidPath(found, part1) == 'Valid'
+        print('{:<42} {:>8} {:>6} {:>8} {:>10.2f} {:>10.2f}'.format(
+            name, len(graph.clusters), len(found) - 1 if found else '-', maze.states_explored, build*1e3, order_time*1e3))
+
+    # dozens of single cell objectives dropped on the free cells of Test4 that the start reaches
+    print('\n{:>10} {:>6} {:>10} {:>10} {:>10} {:>10}'.format('objectives', 'tour', 'graph (ms)', 'A* (ms)', 'DP (ms)', 'DP tour'))
+    base = Maze(None, None, filepath='./mazes/gt_Test4_granularity_2.txt')
+    reachable = DistanceField(base, True, sources=[base.cellToId(*base.getStart(), True)]).distance.reshape(base.get_cells().shape) >= 0
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        for objectives in (5, 10, 20, 30):
+            cells = base.get_cells().copy()
+            cells[cells == OBJECTIVE_CODE] = SPACE_CODE
+            free = np.argwhere((cells == SPACE_CODE) & reachable)
+            cells[tuple(free[rng.choice(len(free), objectives, replace=False)].T)] = OBJECTIVE_CODE
+            filename = os.path.join(directory, 'tour.txt')
+            with open(filename, 'w') as f:
+                for level in range(cells.shape[2]):
+                    f.write('\n'.join(''.join(CELL_CHARS[c] for c in row) for row in cells[:, :, level]) + '\n#\n')
+            maze = Maze(None, None, filepath=filename)
+            start = time.perf_counter()
+            graph = ObjectiveGraph(maze, True)
+            build = time.perf_counter() - start
+            # A* on the MST bound, whatever the number of objectives
+            start = time.perf_counter()
+            order, length = graph.getOrder(dp_max_objectives=0)
+            astar_time = time.perf_counter() - start
+            dp_time, dp_length = '-', '-'
+            if len(graph.clusters) <= TOUR_DP_MAX_OBJECTIVES:
+                start = time.perf_counter()
+                dp_length = graph.getOrder()[1]
+                dp_time = '{:.2f}'.format((time.perf_counter() - start)*1e3)
+                assert dp_length == length, 'dynamic programming and A* tours differ'
+            assert maze.isValidPath(graph.getPath(order=order), True) == 'Valid'
+            print('{:>10} {:>6.0f} {:>10.2f} {:>10.2f} {:>10} {:>10}'.format(objectives, length, build*1e3, astar_time*1e3, dp_time, dp_length))
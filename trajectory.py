@@ -0,0 +1,181 @@
+# trajectory.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the post-processing of searched paths into waypoints: runs
+of moves in one direction are collapsed to their ends, and, given the walls of
+the map, configurations of the same shape are joined by straight moves that
+geometry.does_alien_sweep_touch_wall_batch clears. Shape changes and objectives
+are always kept as waypoints.
+"""
+
+import numpy as np
+
+from const import *
+from geometry import does_alien_sweep_touch_wall_batch
+
+def _level(config, shapes):
+    # shape index of a config, or the level of a (row, col, level) maze file cell
+    return shapes.index(config[SHAPE]) if isinstance(config[SHAPE], str) else config[SHAPE]
+
+def path_length(path):
+    """Returns the distance the centroid travels along a path, shape changes travel none"""
+    if(len(path) < 2):
+        return 0.0
+    points = np.array([config[:2] for config in path], dtype=float)
+    return float(np.sum(np.linalg.norm(np.diff(points, axis=0), axis=1)))
+
+def compress_path(path, keep=()):
+    """Collapses every run of moves in one direction into its first and last configuration
+
+        Args:
+            path (list): configurations (x, y, shape) or maze file cells (row, col, level)
+            keep (iterable): configurations that stay waypoints, such as the objectives the path visits
+
+        Return:
+            list: the waypoints, the first and last configuration of the path included
+    """
+    keep = set(keep)
+    waypoints = list(path[:1])
+    for i in range(1, len(path) - 1):
+        prev, cur, nxt = waypoints[-1], path[i], path[i+1]
+        if(cur in keep or not prev[SHAPE] == cur[SHAPE] == nxt[SHAPE]):
+            waypoints.append(cur)
+            continue
+        ux, uy = cur[X] - prev[X], cur[Y] - prev[Y]
+        vx, vy = nxt[X] - cur[X], nxt[Y] - cur[Y]
+        if(ux*vy - uy*vx != 0 or ux*vx + uy*vy <= 0):
+            waypoints.append(cur)
+    if(len(path) > 1):
+        waypoints.append(path[-1])
+    return waypoints
+
+def shortcut_path(path, walls, granularity, lengths, widths, shapes=ALIEN_SHAPES, keep=()):
+    """Replaces runs of same shape configurations by the straight moves between them that touch no wall
+
+        From each waypoint the path jumps to the furthest later configuration of
+        the same run that can be reached in a straight line, a run ending at a
+        shape change or at a configuration in keep. A move between neighboring
+        configurations is kept even if its sweep touches a wall, since the maze
+        already allowed it.
+
+        Args:
+            path (list): configurations [(x, y, shape), ...]
+            walls (list): walls in the format [(startx, starty, endx, endy), ...] or a WallIndex built over them
+            granularity (int): The granularity of the map
+            lengths (list): line segment length of each shape
+            widths (list): width of each shape
+            shapes (list): possible shapes of the alien
+            keep (iterable): configurations that stay waypoints, such as the objectives the path visits
+
+        Return:
+            list: the configurations of path the shortcut path goes through
+    """
+    keep = set(keep)
+    configs = np.array([(config[X], config[Y], _level(config, shapes)) for config in path], dtype=float).reshape(-1, 3)
+    waypoints = list(path[:1])
+    start = 0
+    while(start < len(path) - 1):
+        # the run of the same shape, up to and including the next configuration to keep
+        end = start + 1
+        while(end < len(path) - 1 and path[end] not in keep and path[end+1][SHAPE] == path[start][SHAPE]):
+            end += 1
+        if(path[end][SHAPE] != path[start][SHAPE]):
+            waypoints.append(path[end])
+            start = end
+            continue
+        candidates = np.arange(start + 2, end + 1)
+        if(len(candidates)):
+            touched = does_alien_sweep_touch_wall_batch(np.repeat(configs[start:start+1], len(candidates), axis=0), configs[candidates],
+                                                        walls, granularity, lengths, widths, shapes)
+            clear = candidates[~touched]
+            nxt = int(clear[-1]) if len(clear) else start + 1
+        else:
+            nxt = start + 1
+        waypoints.append(path[nxt])
+        start = nxt
+    return waypoints
+
+def smooth_path(path, walls=None, granularity=0, lengths=None, widths=None, shapes=ALIEN_SHAPES, keep=()):
+    """Turns a path into waypoints, see compress_path and shortcut_path
+
+        Shortcuts are only taken when walls are given, otherwise the waypoints
+        are the compressed path, which is the only option for maze file paths.
+
+        Return:
+            (list, dict): the waypoints, and the number of configs and waypoints
+                          and the length of the path before and after
+    """
+    waypoints = path
+    if(walls is not None and len(path) > 2):
+        waypoints = shortcut_path(path, walls, granularity, lengths, widths, shapes, keep)
+    waypoints = compress_path(waypoints, keep)
+    stats = {'configs': len(path), 'waypoints': len(waypoints),
+             'length': path_length(path), 'waypoint_length': path_length(waypoints)}
+    return waypoints, stats
+
+def smooth_maze_path(maze, path):
+    """smooth_path of a path searched in maze, keeping the objectives it visits
+
+        A maze transformed from a map configuration is smoothed with the walls it
+        was built from, see transform.updateMaze; a maze read from a file only
+        has its path compressed.
+    """
+    part1 = maze.alien is None
+    keep = [config for config in path if maze.isObjective(config[0], config[1], config[2], part1)]
+    if(part1 or maze.walls is None):
+        return smooth_path(path, keep=keep)
+    alien = maze.alien
+    return smooth_path(path, maze.walls, maze.granularity, alien.get_lengths(), alien.get_widths(), alien.get_shapes(), keep)
+
+def describe(stats):
+    """Returns a human readable summary of the stats of smooth_path"""
+    configs, waypoints = stats['configs'], stats['waypoints']
+    length, waypoint_length = stats['length'], stats['waypoint_length']
+    return '{} configs -> {} waypoints ({:.1f}% fewer), length {:.1f} -> {:.1f} ({:.1f}% shorter)'.format(
+        configs, waypoints, 100 * (1 - waypoints / configs) if configs else 0,
+        length, waypoint_length, 100 * (1 - waypoint_length / length) if length else 0)
+
+if __name__ == '__main__':
+    import time
+
+    from geometry import WallIndex, does_alien_touch_wall_batch
+    from mapconfig import loadMap
+    from search import bfs
+    from transform import transformToMaze
+    from util import configsToArray
+
+    configfile = './maps/test_config.txt'
+    print('{:<22} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10} {:>9}'.format(
+        'map', 'configs', 'compressed', 'waypoints', 'length', 'smoothed', 'replay (s)', 'time (ms)'))
+    for granularity in (2, 5):
+        for map_name in ('Test1', 'Test2', 'Test3', 'Test4'):
+            section = loadMap(configfile, map_name)
+            alien, walls = section.makeAlien(), section.getWalls()
+            maze = transformToMaze(alien, section.getGoals(), WallIndex(walls), section.window, granularity)
+            path = bfs(maze)
+            if path is None:
+                continue
+            start = time.perf_counter()
+            waypoints, stats = smooth_maze_path(maze, path)
+            elapsed = time.perf_counter() - start
+
+            # every waypoint is a config of the path, every move between waypoints either
+            # keeps its shape and touches no wall, densely sampled, or is a step of the path
+            assert waypoints[0] == path[0] and waypoints[-1] == path[-1]
+            assert all(config in path for config in waypoints)
+            shapes, lengths, widths = alien.get_shapes(), alien.get_lengths(), alien.get_widths()
+            for a, b in zip(waypoints, waypoints[1:]):
+                if(a[SHAPE] != b[SHAPE] or abs(a[X] - b[X]) + abs(a[Y] - b[Y]) <= granularity):
+                    continue
+                samples = configsToArray([a], shapes) + np.linspace(0, 1, 200)[:, None] * (configsToArray([b], shapes) - configsToArray([a], shapes))
+                assert not does_alien_touch_wall_batch(samples, walls, granularity, lengths, widths, shapes).any(), (map_name, a, b)
+
+            print('{:<22} {:>8} {:>10} {:>10} {:>10.1f} {:>10.1f} {:>10.2f} {:>9.1f}'.format(
+                '{} granularity {}'.format(map_name, granularity), stats['configs'], len(compress_path(path)), stats['waypoints'],
+                stats['length'], stats['waypoint_length'], 0.05 * stats['waypoints'], elapsed * 1e3))
+            print('    ' + describe(stats))
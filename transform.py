@@ -14,21 +14,68 @@ to the maze.
 """
 import copy
 # from arm import Arm
-from maze import Maze
+from maze import Maze, NoStartError, NoObjectiveError
 from search import *
 from geometry import *
 from const import *
 from util import *
 import os
+import hashlib
+import profiling
+import multiprocessing
+import time
+import numpy as np
 # debugging inputmap: import pprint
-def transformToMaze(alien, goals, walls, window,granularity):
+
+# side, in cells, of the square tiles the grid is evaluated in
+TILE_SIZE = 32
+
+def _evaluate_configs(configs, shapes, lengths, widths, walls, goals, window, granularity):
+    """Cell codes of an (N, 3) array of configurations
+    """
+    if(profiling.enabled):
+        profiling.count('transform.evaluate.cells', len(configs))
+    with profiling.timer('transform.evaluate'):
+        wall = (~is_alien_within_window_batch(configs,window,granularity,lengths,widths,shapes)
+                | does_alien_touch_wall_batch(configs,walls,granularity,lengths,widths,shapes))
+        goal = ~wall & does_alien_touch_goal_batch(configs,goals,lengths,widths,shapes)
+    return np.where(wall, WALL_CODE, np.where(goal, OBJECTIVE_CODE, SPACE_CODE)).astype(np.uint8)
+
+def _evaluate_cells(xs, ys, shape_idxs, shapes, lengths, widths, walls, goals, window, granularity):
+    """Cell codes of the grid spanned by the given x and y coordinates and shape layers
+    """
+    cx, cy, cs = np.meshgrid(xs, ys, shape_idxs, indexing='ij')
+    configs = np.stack([cx.ravel(), cy.ravel(), cs.ravel()], axis=1)
+    return _evaluate_configs(configs, shapes, lengths, widths, walls, goals, window, granularity).reshape(cx.shape)
+
+def _fill_tile(cells, x0, y0, shape_idxs, xs, ys, shapes, lengths, widths, walls, goals, window, granularity):
+    """Evaluates the given shape layers of one tile and writes their cell codes into cells
+    """
+    cells[x0:x0+TILE_SIZE, y0:y0+TILE_SIZE, shape_idxs] = _evaluate_cells(
+        xs[x0:x0+TILE_SIZE], ys[y0:y0+TILE_SIZE], shape_idxs, shapes, lengths, widths, walls, goals, window, granularity)
+
+# state of a transform worker process, set once by _init_worker
+_worker = {}
+
+def _init_worker(buffer, grid_shape, tile_args):
+    _worker['cells'] = np.frombuffer(buffer, dtype=np.uint8).reshape(grid_shape)
+    _worker['tile_args'] = tile_args
+
+def _fill_tile_task(task):
+    x0, y0, shape_idx = task
+    _fill_tile(_worker['cells'], x0, y0, [shape_idx], *_worker['tile_args'])
+
+def transformToMaze(alien, goals, walls, window,granularity,workers=1):
     """This function transforms the given 2D map to the maze in MP1.
     
         Args:
             alien (Alien): alien instance
             goals (list): [(x, y, r)] of goals
-            walls (list): [(startx, starty, endx, endy)] of walls
+            walls (list): [(startx, starty, endx, endy)] of walls, or a WallIndex built over them
             window (tuple): (width, height) of the window
+            workers (int): number of processes evaluating the grid. With more than one, the
+                           (shape layer, tile) pieces are shared out to a process pool that writes
+                           straight into a shared memory grid
 
         Return:
             Maze: the maze instance generated based on input arguments.
@@ -38,97 +85,539 @@ def transformToMaze(alien, goals, walls, window,granularity):
     #initialize input map
     num_rows = int(window[1]/granularity)+1
     num_cols = int(window[0]/granularity)+1
-    inputmap = [[[SPACE_CHAR for k in range(3)] for j in range(num_rows)] for i in range(num_cols)]
-    #get initial centroid for starting position
+    shapes = alien.get_shapes()
+    grid_shape = (num_cols,num_rows,len(shapes))
+
+    # cell configurations, computed the same way as idxToConfig
+    xs = (np.arange(num_cols)*granularity + offsets[X]).astype(int)
+    ys = (np.arange(num_rows)*granularity + offsets[Y]).astype(int)
+    if(not isinstance(walls, WallIndex)):
+        walls = WallIndex(walls)
+    tile_args = (xs, ys, shapes, alien.get_lengths(), alien.get_widths(), walls, goals, window, granularity)
+    tiles = [(x0, y0) for x0 in range(0, num_cols, TILE_SIZE) for y0 in range(0, num_rows, TILE_SIZE)]
+
+    # evaluate the grid tile by tile, so each tile is only tested against nearby walls
+    with profiling.timer('transform.transformToMaze'):
+        if(workers > 1):
+            buffer = multiprocessing.RawArray('B', num_cols*num_rows*len(shapes))
+            tasks = [(x0, y0, shape_idx) for shape_idx in range(len(shapes)) for x0, y0 in tiles]
+            with multiprocessing.Pool(workers, _init_worker, (buffer, grid_shape, tile_args)) as pool:
+                pool.map(_fill_tile_task, tasks, chunksize=max(1, len(tasks) // (4*workers)))
+            cells = np.frombuffer(buffer, dtype=np.uint8).reshape(grid_shape)
+        else:
+            cells = np.zeros(grid_shape, dtype=np.uint8)
+            for x0, y0 in tiles:
+                _fill_tile(cells, x0, y0, list(range(len(shapes))), *tile_args)
+    if(profiling.enabled):
+        profiling.count('transform.transformToMaze.cells', cells.size)
+
+    #get initial centroid for starting position, it stays a wall or goal if it is one
     startIdx = configToIdx(alien.get_config(),offsets,granularity,alien)
-    #print(startIdx)
-    inputmap[startIdx[0]][startIdx[1]][startIdx[2]] = START_CHAR
-
-    for x in range(num_cols):
-        for y in range(num_rows):
-            for shape in range(3):
-                config = idxToConfig([x,y,shape],offsets,granularity,alien)
-                alien.set_alien_config(config)
-                #print(alien.get_config())
-                if( (not is_alien_within_window(alien,window,granularity))
-                    or does_alien_touch_wall(alien,walls,granularity)):
-                    inputmap[x][y][shape] = WALL_CHAR
-                    continue
-                    
-                if(does_alien_touch_goal(alien,goals)):
-                    inputmap[x][y][shape] = OBJECTIVE_CHAR
-                
+    if(cells[startIdx] == SPACE_CODE):
+        cells[startIdx] = START_CODE
+
+    return _with_map(Maze(cells,alien,granularity), goals, walls, window)
+
+def transformToLazyMaze(alien, goals, walls, window, granularity):
+    """Same maze as transformToMaze, but its cells are only evaluated when first accessed.
+
+        Cells are evaluated in blocks of LAZY_BLOCK_SIZE x LAZY_BLOCK_SIZE (x, y) cells over
+        every shape, and kept in the maze's uint8 array where UNKNOWN_CODE marks the cells not
+        evaluated yet (see Maze.getEvaluatedCells). Unlike transformToMaze, a map without any
+        goal only shows up as a search that finds no path.
+
+        Args:
+            alien (Alien): alien instance
+            goals (list): [(x, y, r)] of goals
+            walls (list): [(startx, starty, endx, endy)] of walls, or a WallIndex built over them
+            window (tuple): (width, height) of the window
+            granularity (int): granularity of the maze
+
+        Return:
+            Maze: the lazy maze instance
+    """
+    offsets = [0,0,0]
+    shapes = alien.get_shapes()
+    grid_shape = (int(window[0]/granularity)+1, int(window[1]/granularity)+1, len(shapes))
+    if(not isinstance(walls, WallIndex)):
+        walls = WallIndex(walls)
+    lengths, widths = alien.get_lengths(), alien.get_widths()
+
+    def evaluator(idx):
+        # configurations computed the same way as idxToConfig
+        configs = np.stack([(idx[:, X]*granularity + offsets[X]).astype(int),
+                            (idx[:, Y]*granularity + offsets[Y]).astype(int), idx[:, SHAPE]], axis=1).astype(float)
+        return _evaluate_configs(configs, shapes, lengths, widths, walls, goals, window, granularity)
+
+    cells = np.full(grid_shape, UNKNOWN_CODE, dtype=np.uint8)
+    return _with_map(Maze(cells,alien,granularity,offsets,evaluator=evaluator), goals, walls, window)
+
+def transformToRasterMaze(alien, goals, walls, window, granularity):
+    """Same maze as transformToMaze, with every wall rasterized into the grid of each shape
+
+        Instead of testing every cell against the walls around it, each wall marks
+        the cells within its Minkowski sum with each alien shape, see
+        geometry.rasterize_walls, and only the free cells around the goals are
+        tested against them.
+
+        Args:
+            alien (Alien): alien instance
+            goals (list): [(x, y, r)] of goals
+            walls (list): [(startx, starty, endx, endy)] of walls, or a WallIndex built over them
+            window (tuple): (width, height) of the window
+            granularity (int): granularity of the maze
+
+        Return:
+            Maze: the maze instance generated based on input arguments.
+    """
+    offsets = [0,0,0]
+    num_rows = int(window[1]/granularity)+1
+    num_cols = int(window[0]/granularity)+1
+    shapes, lengths, widths = alien.get_shapes(), alien.get_lengths(), alien.get_widths()
+
+    # cell configurations, computed the same way as idxToConfig
+    xs = (np.arange(num_cols)*granularity + offsets[X]).astype(int)
+    ys = (np.arange(num_rows)*granularity + offsets[Y]).astype(int)
+    with profiling.timer('transform.transformToRasterMaze'):
+        cx, cy, cs = np.meshgrid(xs, ys, np.arange(len(shapes)), indexing='ij')
+        configs = np.stack([cx.ravel(), cy.ravel(), cs.ravel()], axis=1)
+        wall = ~is_alien_within_window_batch(configs, window, granularity, lengths, widths, shapes).reshape(cx.shape)
+        wall |= rasterize_walls(xs, ys, walls, granularity, lengths, widths, shapes)
+        goal = rasterize_goals(xs, ys, goals, lengths, widths, shapes, skip=wall)
+        cells = np.where(wall, WALL_CODE, np.where(goal, OBJECTIVE_CODE, SPACE_CODE)).astype(np.uint8)
+    if(profiling.enabled):
+        profiling.count('transform.transformToRasterMaze.cells', cells.size)
+
+    #get initial centroid for starting position, it stays a wall or goal if it is one
+    startIdx = configToIdx(alien.get_config(),offsets,granularity,alien)
+    if(cells[startIdx] == SPACE_CODE):
+        cells[startIdx] = START_CODE
+
+    return _with_map(Maze(cells,alien,granularity), goals, walls, window)
+
+def _with_map(maze, goals, walls, window):
+    # remember the map a maze was built from, for updateMaze
+    maze.goals = [tuple(goal) for goal in goals]
+    maze.walls = [tuple(wall) for wall in (walls.segments.tolist() if isinstance(walls, WallIndex) else walls)]
+    maze.window = tuple(window)
+    return maze
+
+def _cell_range(low, high, offset, granularity, count):
+    first = int(np.floor((low - offset) / granularity)) - 1 if np.isfinite(low) else 0
+    last = int(np.ceil((high - offset) / granularity)) + 2 if np.isfinite(high) else count
+    return max(0, first), min(count, last)
+
+def updateMaze(maze, added_walls=(), removed_walls=(), added_goals=(), removed_goals=()):
+    """Updates a maze built by transformToMaze after walls or goals of its map changed.
+
+        Only the cells the alien could reach a changed wall or goal from are evaluated again:
+        the box around each change, widened by the largest reach of the alien (half its
+        length and width plus the granularity tolerance of the wall test). The result is
+        the same grid transformToMaze builds for the edited map.
 
-    #maze = Maze(inputmap,alien,granularity)
-    #maze.saveToFile('./mazes/Test1_granularity_2.txt')
-    return Maze(inputmap,alien,granularity)
+        Args:
+            maze (Maze): maze built by transformToMaze, updated in place
+            added_walls, removed_walls (list): [(startx, starty, endx, endy)] of walls
+            added_goals, removed_goals (list): [(x, y, r)] of goals
+
+        Return:
+            np.ndarray: flat ids (see Maze.cellToId) of the cells whose code changed
+
+        Raises:
+            NoStartError: when the edit makes the start a wall or a goal, where transformToMaze
+                          raises it too. The maze is left unchanged
+    """
+    alien, granularity = maze.alien, maze.granularity
+    walls = list(maze.walls)
+    goals = list(maze.goals)
+    for wall in removed_walls:
+        walls.remove(tuple(wall))
+    for goal in removed_goals:
+        goals.remove(tuple(goal))
+    walls.extend(tuple(wall) for wall in added_walls)
+    goals.extend(tuple(goal) for goal in added_goals)
+
+    lengths, widths, shapes = alien.get_lengths(), alien.get_widths(), alien.get_shapes()
+    reach = max(length/2 + width/2 for length, width in zip(lengths, widths)) + granularity/np.sqrt(2)
+    boxes = []
+    for x0, y0, x1, y1 in list(added_walls) + list(removed_walls):
+        if((x0, y0) == (x1, y1)):
+            # zero length walls touch every cell sharing their row or column, see WallIndex
+            boxes.append((-np.inf, -np.inf, np.inf, np.inf))
+        else:
+            boxes.append((min(x0, x1) - reach, min(y0, y1) - reach, max(x0, x1) + reach, max(y0, y1) + reach))
+    for x, y, r in list(added_goals) + list(removed_goals):
+        boxes.append((x - r - reach, y - r - reach, x + r + reach, y + r + reach))
+
+    num_cols, num_rows, _ = maze.getDimensions()
+    wall_index = WallIndex(walls)
+    start_idx = configToIdx(alien.get_config(), maze.offsets, granularity, alien)
+    updates = []
+    for left, top, right, bottom in boxes:
+        # cell ranges covering the box, one cell wider on every side
+        ix0, ix1 = _cell_range(left, right, maze.offsets[X], granularity, num_cols)
+        iy0, iy1 = _cell_range(top, bottom, maze.offsets[Y], granularity, num_rows)
+        if(ix0 >= ix1 or iy0 >= iy1):
+            continue
+        xs = (np.arange(ix0, ix1)*granularity + maze.offsets[X]).astype(int)
+        ys = (np.arange(iy0, iy1)*granularity + maze.offsets[Y]).astype(int)
+        codes = _evaluate_cells(xs, ys, list(range(len(shapes))), shapes, lengths, widths, wall_index, goals, maze.window, granularity)
+        if(ix0 <= start_idx[X] < ix1 and iy0 <= start_idx[Y] < iy1):
+            start = (start_idx[X] - ix0, start_idx[Y] - iy0, start_idx[SHAPE])
+            if(codes[start] != SPACE_CODE):
+                raise NoStartError("Maze has no start")
+            codes[start] = START_CODE
+        updates.append((ix0, iy0, codes))
+    # applied only once every box is evaluated, so a failed update changes nothing
+    changed = [maze.applyCells(ix0, iy0, codes) for ix0, iy0, codes in updates]
+    maze.walls = walls
+    maze.goals = goals
+    return np.unique(np.concatenate(changed)) if changed else np.zeros(0, dtype=np.int64)
+
+def transformToCorridorMaze(alien, goals, walls, window, granularity, centers, radius):
+    """Builds the maze of the given granularity restricted to a corridor around some points.
+
+        Only the cells whose (x, y) lies within radius (in each axis) of one of the centers are
+        evaluated; every other cell is a wall. The maze covers the bounding box of the
+        corridor through its offsets, so the full grid is never built.
+
+        Args:
+            alien (Alien): alien instance
+            goals (list): [(x, y, r)] of goals
+            walls (list): [(startx, starty, endx, endy)] of walls, or a WallIndex built over them
+            window (tuple): (width, height) of the window
+            granularity (int): granularity of the maze
+            centers (list): [(x, ...)] points the corridor is built around, e.g. a coarser path
+            radius (float): half width of the corridor
+
+        Return:
+            tuple: (Maze, number of evaluated cells)
+    """
+    num_cols = int(window[0]/granularity)+1
+    num_rows = int(window[1]/granularity)+1
+    centers = np.array([center[:2] for center in centers], dtype=float).reshape(-1, 2)
+    ix0, ix1 = _cell_range(centers[:, X].min() - radius, centers[:, X].max() + radius, 0, granularity, num_cols)
+    iy0, iy1 = _cell_range(centers[:, Y].min() - radius, centers[:, Y].max() + radius, 0, granularity, num_rows)
+    # box offsets are whole cells, so every cell has the configuration it has in the full grid
+    offsets = [ix0*granularity, iy0*granularity, 0]
+
+    inside = np.zeros((ix1 - ix0, iy1 - iy0), dtype=bool)
+    for x, y in centers:
+        cx0, cx1 = _cell_range(x - radius, x + radius, offsets[X], granularity, ix1 - ix0)
+        cy0, cy1 = _cell_range(y - radius, y + radius, offsets[Y], granularity, iy1 - iy0)
+        inside[cx0:cx1, cy0:cy1] = True
+
+    shapes = alien.get_shapes()
+    if(not isinstance(walls, WallIndex)):
+        walls = WallIndex(walls)
+    cells = np.full(inside.shape + (len(shapes),), WALL_CODE, dtype=np.uint8)
+    idx = np.argwhere(inside)
+    idx = np.repeat(idx, len(shapes), axis=0)
+    shape_idxs = np.tile(np.arange(len(shapes)), len(idx) // len(shapes))
+    configs = np.stack([(idx[:, X]*granularity + offsets[X]).astype(int),
+                        (idx[:, Y]*granularity + offsets[Y]).astype(int), shape_idxs], axis=1).astype(float)
+    cells[idx[:, X], idx[:, Y], shape_idxs] = _evaluate_configs(
+        configs, shapes, alien.get_lengths(), alien.get_widths(), walls, goals, window, granularity)
+
+    startIdx = configToIdx(alien.get_config(),offsets,granularity,alien)
+    if(all(0 <= i < n for i, n in zip(startIdx, cells.shape)) and cells[startIdx] == SPACE_CODE):
+        cells[startIdx] = START_CODE
+    return Maze(cells,alien,granularity,offsets), len(configs)
+
+def planCoarseToFine(alien, goals, walls, window, granularity, coarse_granularity=10, radius=None, searchMethod='bfs'):
+    """Plans at a fine granularity without building the full fine maze.
+
+        The path is first found on the coarse granularity maze, then searched again at the
+        fine granularity inside a corridor of cells around the coarse path, evaluated on
+        demand (see transformToCorridorMaze). When the coarse maze or the corridor has no
+        solution, the full fine maze is built and searched instead. The corridor path is
+        the shortest one within the corridor, not necessarily within the whole maze.
+
+        Args:
+            alien (Alien): alien instance
+            goals (list): [(x, y, r)] of goals
+            walls (list): [(startx, starty, endx, endy)] of walls, or a WallIndex built over them
+            window (tuple): (width, height) of the window
+            granularity (int): granularity of the returned path
+            coarse_granularity (int): granularity of the first search
+            radius (float): half width of the corridor, two coarse cells by default
+            searchMethod (str): search method used at both granularities, see search.SEARCH_METHODS
+
+        Return:
+            tuple: (path or None, dict of statistics: evaluated and total fine cells, coarse cells, fallback)
+    """
+    if(radius is None):
+        radius = 2*coarse_granularity
+    if(not isinstance(walls, WallIndex)):
+        walls = WallIndex(walls)
+    shapes = alien.get_shapes()
+    total = (int(window[0]/granularity)+1) * (int(window[1]/granularity)+1) * len(shapes)
+    stats = {'coarse_cells': 0, 'evaluated_cells': 0, 'total_cells': total, 'fallback': False}
+
+    path = None
+    try:
+        coarse = transformToMaze(alien, goals, walls, window, coarse_granularity)
+        stats['coarse_cells'] = coarse.get_cells().size
+        coarse_path = search(coarse, searchMethod)
+    except (NoStartError, NoObjectiveError):
+        coarse_path = None
+    if(coarse_path):
+        try:
+            corridor, stats['evaluated_cells'] = transformToCorridorMaze(
+                alien, goals, walls, window, granularity, [alien.get_config()] + coarse_path, radius)
+            path = search(corridor, searchMethod)
+        except (NoStartError, NoObjectiveError):
+            path = None
+    if(path is None):
+        stats['fallback'] = True
+        stats['evaluated_cells'] += total
+        try:
+            path = search(transformToMaze(alien, goals, walls, window, granularity), searchMethod)
+        except (NoStartError, NoObjectiveError):
+            path = None
+    return path, stats
+
+class MazeCache:
+    """On-disk cache of transformToMaze results
+
+    Entries are keyed on a hash of everything the grid depends on (window, obstacles, goals,
+    alien lengths, widths, shapes, start config and granularity) and hold the uint8 cell
+    grid. Once the entries take more than max_bytes, the least recently used ones are removed.
+    """
+    # bump when the transform changes, so grids built by an older version are not reused
+    VERSION = 1
+
+    def __init__(self, directory=MAZE_CACHE_DIR, max_bytes=MAZE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+    def key(self, alien, goals, walls, window, granularity):
+        """Hex digest identifying the maze transformToMaze builds from these arguments"""
+        if(isinstance(walls, WallIndex)):
+            walls = walls.segments
+        description = repr((self.VERSION, tuple(window), [tuple(wall) for wall in walls], [tuple(goal) for goal in goals],
+                            list(alien.get_lengths()), list(alien.get_widths()), list(alien.get_shapes()),
+                            tuple(alien.get_config()), granularity))
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def transformToMaze(self, alien, goals, walls, window, granularity, workers=1):
+        """transformToMaze, reusing the cached grid when the same maze was built before"""
+        if(not isinstance(walls, WallIndex)):
+            walls = WallIndex(walls)
+        path = os.path.join(self.directory, self.key(alien, goals, walls, window, granularity) + '.npz')
+        start = time.perf_counter()
+        try:
+            with np.load(path) as entry:
+                cells, build_time = entry['cells'], float(entry['build_time'])
+        except (OSError, KeyError, ValueError):
+            maze = transformToMaze(alien, goals, walls, window, granularity, workers)
+            self.misses += 1
+            self.__store(path, maze.get_cells(), time.perf_counter() - start)
+            return maze
+        # touching the entry marks it as recently used
+        os.utime(path)
+        maze = _with_map(Maze(cells, alien, granularity), goals, walls, window)
+        self.hits += 1
+        self.time_saved += max(0.0, build_time - (time.perf_counter() - start))
+        return maze
+
+    def __store(self, path, cells, build_time):
+        os.makedirs(self.directory, exist_ok=True)
+        # written under a temporary name first, so a concurrent run never reads half an entry
+        temporary = '{}.{}.tmp.npz'.format(path[:-len('.npz')], os.getpid())
+        np.savez(temporary, cells=cells, build_time=build_time)
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz') and '.tmp.' not in name:
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if(total <= self.max_bytes):
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def report(self):
+        return 'maze cache: {} hits, {} misses, {:.2f} s saved'.format(self.hits, self.misses, self.time_saved)
 
 
 if __name__ == '__main__':
-    import configparser
+    import argparse
+    from mapconfig import loadMap
+    from regression import compare_all, describe
 
-    def generate_test_mazes(granularities,map_names):
+    def generate_test_mazes(granularities,map_names,workers=1,cache=None,raster=False):
+        build = cache.transformToMaze if cache else transformToMaze
+        if(raster):
+            build = lambda alien,goals,walls,window,granularity,workers: transformToRasterMaze(alien,goals,walls,window,granularity)
         for granularity in granularities:
             for map_name in map_names:
                 try:
                     print('converting map {} with granularity {}'.format(map_name,granularity))
-                    configfile = './maps/test_config.txt'
-                    config = configparser.ConfigParser()
-                    config.read(configfile)
-                    lims = eval(config.get(map_name, 'Window'))
-                    # print(lis)
-                    # Parse config file
-                    window = eval(config.get(map_name, 'Window'))
-                    centroid = eval(config.get(map_name, 'StartPoint'))
-                    widths = eval(config.get(map_name, 'Widths'))
-                    alien_shape = 'Ball'
-                    lengths = eval(config.get(map_name, 'Lengths'))
-                    alien_shapes = ['Horizontal','Ball','Vertical']
-                    obstacles = eval(config.get(map_name, 'Obstacles'))
-                    boundary = [(0,0,0,lims[1]),(0,0,lims[0],0),(lims[0],0,lims[0],lims[1]),(0,lims[1],lims[0],lims[1])]
-                    obstacles.extend(boundary)
-                    goals = eval(config.get(map_name, 'Goals'))
-                    alien = Alien(centroid,lengths,widths,alien_shapes,alien_shape,window)
-                    generated_maze = transformToMaze(alien,goals,obstacles,window,granularity)
+                    map_config = loadMap('./maps/test_config.txt', map_name)
+                    alien = map_config.makeAlien()
+                    generated_maze = build(alien,map_config.getGoals(),map_config.getWalls(),map_config.window,granularity,workers)
                     generated_maze.saveToFile('./mazes/{}_granularity_{}.txt'.format(map_name,granularity))
                 except Exception as e:
                     print('Exception at maze {} and granularity {}: {}'.format(map_name,granularity,e))
+        if(cache):
+            print(cache.report())
     def compare_test_mazes_with_gt(granularities,map_names):
-        name_dict = {'%':'walls','.':'goals',' ':'free space','P':'start'}
-        shape_dict = ['Horizontal','Ball','Vertical']
+        # see regression.py for the machine readable report
+        for result in compare_all(map_names,granularities):
+            print(describe(result))
+    def benchmark_workers(map_name,granularity,worker_counts=(1,2,4,8)):
+        map_config = loadMap('./maps/test_config.txt', map_name)
+        window, obstacles, goals = map_config.window, map_config.getWalls(), map_config.getGoals()
+        alien = map_config.makeAlien()
+        print('scaling of transformToMaze on {} at granularity {} ({} cpus available)'.format(map_name,granularity,os.cpu_count()))
+        reference = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            generated_map = transformToMaze(alien,goals,obstacles,window,granularity,workers).get_map()
+            elapsed = time.perf_counter() - start
+            if(reference is None):
+                reference = (generated_map, elapsed)
+            assert generated_map == reference[0], 'output with {} workers differs from the serial output'.format(workers)
+            print('{} workers: {:.3f} s, speedup {:.2f}x'.format(workers,elapsed,reference[1]/elapsed))
+
+    def benchmark_updates(map_name,granularities=(1,2,5),wall_lengths=(5,10,20,40,80,160)):
+        map_config = loadMap('./maps/test_config.txt', map_name)
+        window, obstacles, goals = map_config.window, map_config.getWalls(), map_config.getGoals()
+        make_alien = map_config.makeAlien
+        print('updateMaze after adding one horizontal wall to {}, against a full transformToMaze'.format(map_name))
+        print('{:>11} {:>10} {:>12} {:>14} {:>12} {:>14}'.format('granularity','cells','wall length','changed cells','update (ms)','rebuild (ms)'))
         for granularity in granularities:
-            for map_name in map_names:
-                this_maze_file = './mazes/{}_granularity_{}.txt'.format(map_name,granularity)
-                gt_maze_file = './mazes/gt_{}_granularity_{}.txt'.format(map_name,granularity)
-                if(not os.path.exists(gt_maze_file)):
-                    print('no gt available for map {} at granularity {}'.format(map_name,granularity))
+            maze = transformToMaze(make_alien(),goals,obstacles,window,granularity)
+            for wall_length in wall_lengths:
+                wall = (window[0]//2 - wall_length//2, window[1] - 40, window[0]//2 + wall_length//2, window[1] - 40)
+                start = time.perf_counter()
+                changed = updateMaze(maze, added_walls=[wall])
+                update = time.perf_counter() - start
+                start = time.perf_counter()
+                rebuilt = transformToMaze(make_alien(),goals,obstacles+[wall],window,granularity)
+                rebuild = time.perf_counter() - start
+                assert np.array_equal(rebuilt.get_cells(), maze.get_cells()), 'updated maze differs from the rebuilt one'
+                updateMaze(maze, removed_walls=[wall])
+                print('{:>11} {:>10} {:>12} {:>14} {:>12.2f} {:>14.2f}'.format(
+                    granularity, maze.get_cells().size, wall_length, len(changed), update*1e3, rebuild*1e3))
+
+    def benchmark_coarse_to_fine(map_names,granularities=(1,2),coarse_granularity=10):
+        print('planCoarseToFine from granularity {} against a search of the full maze'.format(coarse_granularity))
+        print('{:<14} {:>11} {:>10} {:>15} {:>6} {:>11} {:>12} {:>12} {:>9}'.format(
+            'map','granularity','cells','evaluated cells','path','full path','coarse (s)','full (s)','fallback'))
+        for map_name in map_names:
+            map_config = loadMap('./maps/test_config.txt', map_name)
+            window, obstacles, goals = map_config.window, map_config.getWalls(), map_config.getGoals()
+            for granularity in granularities:
+                alien = map_config.makeAlien()
+                start = time.perf_counter()
+                path, stats = planCoarseToFine(alien,goals,obstacles,window,granularity,coarse_granularity)
+                coarse_time = time.perf_counter() - start
+                start = time.perf_counter()
+                full_path = search(transformToMaze(alien,goals,obstacles,window,granularity),'bfs')
+                full_time = time.perf_counter() - start
+                print('{:<14} {:>11} {:>10} {:>15} {:>6} {:>11} {:>12.3f} {:>12.3f} {:>9}'.format(
+                    map_name, granularity, stats['total_cells'], stats['evaluated_cells'], len(path) if path else '-',
+                    len(full_path) if full_path else '-', coarse_time, full_time, str(stats['fallback'])))
+
+    def benchmark_raster(map_names,granularities=(1,2,5,10)):
+        print('transformToRasterMaze against transformToMaze, best of 3 builds')
+        print('{:<14} {:>11} {:>10} {:>6} {:>13} {:>12} {:>8}'.format('map','granularity','cells','walls','per cell (ms)','raster (ms)','speedup'))
+        for map_name in map_names:
+            map_config = loadMap('./maps/test_config.txt', map_name)
+            window, obstacles, goals = map_config.window, map_config.getWalls(), map_config.getGoals()
+            for granularity in granularities:
+                results = []
+                for transform in (transformToMaze, transformToRasterMaze):
+                    best = None
+                    for _ in range(3):
+                        start = time.perf_counter()
+                        try:
+                            maze = transform(map_config.makeAlien(),goals,obstacles,window,granularity)
+                        except NoStartError:
+                            break
+                        elapsed = time.perf_counter() - start
+                        best = elapsed if best is None else min(best, elapsed)
+                    results.append((best, maze.get_cells() if best is not None else None))
+                (cell_time, cells), (raster_time, raster_cells) = results
+                if(cell_time is None):
+                    continue
+                assert np.array_equal(cells, raster_cells), 'rasterized maze differs on {} at granularity {}'.format(map_name, granularity)
+                print('{:<14} {:>11} {:>10} {:>6} {:>13.2f} {:>12.2f} {:>7.2f}x'.format(
+                    map_name, granularity, cells.size, len(obstacles), cell_time*1e3, raster_time*1e3, cell_time/raster_time))
+
+    def benchmark_lazy(map_names,granularities=(2,5,8,10)):
+        print('bfs on transformToLazyMaze against transformToMaze, times include building the maze')
+        print('{:<14} {:>11} {:>10} {:>15} {:>6} {:>11} {:>10}'.format('map','granularity','cells','evaluated cells','path','eager (s)','lazy (s)'))
+        for map_name in map_names:
+            map_config = loadMap('./maps/test_config.txt', map_name)
+            window, obstacles, goals = map_config.window, map_config.getWalls(), map_config.getGoals()
+            for granularity in granularities:
+                alien = map_config.makeAlien()
+                results = []
+                for transform in (transformToMaze, transformToLazyMaze):
+                    start = time.perf_counter()
+                    try:
+                        maze = transform(alien,goals,obstacles,window,granularity)
+                    except NoStartError:
+                        break
+                    path = bfs(maze)
+                    results.append((time.perf_counter() - start, maze, path, maze.states_explored, maze.getEvaluatedCells()))
+                if(len(results) < 2):
                     continue
-                gt_maze = Maze([],[],[],filepath = gt_maze_file)
-                this_maze = Maze([],[],[],filepath= this_maze_file)
-                gt_map = np.array(gt_maze.get_map())
-                this_map = np.array(this_maze.get_map())
-                difx,dify,difz = np.where(gt_map != this_map)
-                if(difx.size != 0):
-                    diff_dict = {}
-                    for i in ['%','.',' ','P']:
-                        for j in ['%','.',' ','P']:
-                            diff_dict[i + '_'+ j] = []
-                    print('\n\nDifferences in {} at granularity {}:'.format(map_name,granularity))    
-                    for i,j,k in zip(difx,dify,difz):
-                        gt_token = gt_map[i][j][k] 
-                        this_token = this_map[i][j][k]
-                        diff_dict[gt_token + '_' + this_token].append(noAlienidxToConfig((j,i,k),granularity,shape_dict))
-                    for key in diff_dict.keys():
-                        this_list = diff_dict[key]
-                        gt_token = key.split('_')[0]
-                        your_token = key.split('_')[1]
-                        if(len(this_list) != 0):
-                            print('Ground Truth {} mistakenly identified as {}: {}'.format(name_dict[gt_token],name_dict[your_token],this_list))
-                    print('\n\n')
-                else:
-                    print('no differences identified  in {} at granularity {}:'.format(map_name,granularity))
+                (eager_time, eager, path, states, _), (lazy_time, lazy, lazy_path, lazy_states, (evaluated, total)) = results
+                assert (path, states) == (lazy_path, lazy_states), 'lazy bfs differs on {} at granularity {}'.format(map_name, granularity)
+                assert path is None or lazy.isValidPath(path) == eager.isValidPath(path) == 'Valid'
+                assert np.array_equal(eager.get_cells(), lazy.get_cells()), 'lazy cells differ'
+                print('{:<14} {:>11} {:>10} {:>15} {:>6} {:>11.3f} {:>10.3f}'.format(
+                    map_name, granularity, total, evaluated, len(path) if path else '-', eager_time, lazy_time))
+
+    parser = argparse.ArgumentParser(description='generate the test mazes and compare them with the ground truth')
+    parser.add_argument('--workers', dest='workers', type=int, default=1,
+                        help='number of processes used by transformToMaze - default 1')
+    parser.add_argument('--benchmark', default=False, action='store_true',
+                        help='report transformToMaze speedup for 1, 2, 4 and 8 workers instead')
+    parser.add_argument('--benchmark-update', dest='benchmark_update', default=False, action='store_true',
+                        help='report updateMaze time against the size of the edit and of the map instead')
+    parser.add_argument('--benchmark-coarse', dest='benchmark_coarse', default=False, action='store_true',
+                        help='report coarse-to-fine planning against full searches instead')
+    parser.add_argument('--benchmark-lazy', dest='benchmark_lazy', default=False, action='store_true',
+                        help='report cells evaluated by bfs on lazy mazes instead')
+    parser.add_argument('--no-cache', dest='cache', default=True, action='store_false',
+                        help='rebuild every maze instead of reusing the ones cached in '+MAZE_CACHE_DIR)
+    parser.add_argument('--raster', default=False, action='store_true',
+                        help='build the mazes with transformToRasterMaze, without the cache')
+    parser.add_argument('--benchmark-raster', dest='benchmark_raster', default=False, action='store_true',
+                        help='report transformToRasterMaze against transformToMaze instead')
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark_workers('Test3',1)
+        raise SystemExit
+    if args.benchmark_update:
+        benchmark_updates('Test3')
+        raise SystemExit
+    if args.benchmark_lazy:
+        benchmark_lazy(['Test1','Test2','Test3','Test4','NoSolutionMap'])
+        raise SystemExit
+    if args.benchmark_raster:
+        benchmark_raster(['Test1','Test2','Test3','Test4','NoSolutionMap'])
+        raise SystemExit
+    if args.benchmark_coarse:
+        benchmark_coarse_to_fine(['Test1','Test2','Test3','Test4','NoSolutionMap'])
+        raise SystemExit
+
     ### change these to speed up your testing early on! 
     granularities = [2,5,8,10]
     map_names = ['Test1','Test2','Test3','Test4','NoSolutionMap']
-    generate_test_mazes(granularities,map_names)
+    generate_test_mazes(granularities,map_names,args.workers,MazeCache() if args.cache and not args.raster else None,args.raster)
     compare_test_mazes_with_gt(granularities,map_names)
@@ -11,6 +11,7 @@
 """
 This file contains helper functions that helps other modules, 
 """
+import numpy as np
 
 # Transform between alien configs and an array index
 def configToIdx(config, offsets, granularity,alien):
@@ -27,6 +28,10 @@ def idxToConfig(index, offsets, granularity,alien):
     result.append(alien.get_shapes()[index[-1]])
     return tuple(result)
 
+def configsToArray(configs, shapes):
+    # [(x, y, shape), ...] -> (N, 3) float array with the shape replaced by its index
+    return np.array([(config[0], config[1], shapes.index(config[-1])) for config in configs], dtype=float).reshape(-1, 3)
+
 def noAlienidxToConfig(index,granularity,shape_dict):
     result = []
     for i in range(len(index[:2])):